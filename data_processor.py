@@ -1,24 +1,50 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
 import os
 import pathlib
 import re
-from datetime import datetime, timedelta
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+from zoneinfo import ZoneInfo
 from math import floor
 from io import BytesIO
 import dropbox
 import plotly.graph_objects as go
 import tempfile
+import shutil
+import threading
+import queue
 import plotly.io as pio
+try:
+    from kaleido.scopes.plotly import PlotlyScope  # Kaleido v0: persistent renderer processes
+except ImportError:
+    PlotlyScope = None
 #import pdfkit
 #from mailersend import emails
 import base64
 from dotenv import load_dotenv
 from xhtml2pdf import pisa
+from pypdf import PdfReader, PdfWriter
+from reportlab.lib.colors import HexColor, toColor
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas as rl_canvas
+from reportlab.graphics import renderPDF
+from svglib.svglib import svg2rlg
 import json
+import csv
 import streamlit as st
 from google.oauth2.service_account import Credentials
 import gspread
-import inspect
+from functools import lru_cache
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 
 
@@ -44,22 +70,18 @@ def format_time_columns(df):
     for col in time_columns:
         if col in df.columns:
             # 1) Coerce blanks/invalid → NaN
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+            values = pd.to_numeric(df[col], errors="coerce")
 
             if col == "Time To Goal":
+                formatted = decimal_to_hhmmss_column(values, missing="--:--:--")
                 # include gear icon if _TTG_Adjusted is True
-                df[col] = df.apply(
-                    lambda row: (
-                        decimal_to_hhmmss(row[col])
-                        + (" ⚙️" if row.get("_TTG_Adjusted") else "")
-                    ) if pd.notna(row[col]) else "--:--:--",
-                    axis=1
-                )
+                if "_TTG_Adjusted" in df.columns:
+                    gear = (values.notna() & df["_TTG_Adjusted"].astype(bool)).to_numpy()
+                    formatted[gear] = formatted[gear] + " ⚙️"
+                df[col] = formatted
             else:
                 # neutral format, no +/- sign
-                df[col] = df[col].apply(
-                    lambda x: decimal_to_hhmmss_nosign(x) if pd.notna(x) else "--:--:--"
-                )
+                df[col] = decimal_to_hhmmss_nosign_column(values, missing="--:--:--")
 
     return df
 
@@ -115,6 +137,70 @@ def decimal_to_hhmmss_nosign(decimal_hours):
     return f"{hours:02}:{minutes:02}:{seconds:02}"
 
 
+# "00".."99" lookup so column formatting never calls format() per cell
+_TWO_DIGITS = np.array([f"{i:02}" for i in range(100)], dtype=object)
+
+
+def _hhmmss_column(values, signed, missing):
+    """
+    Shared integer-arithmetic core for the column formatters below.
+
+    Truncates to whole seconds the same way int() does in the scalar
+    versions, then assembles the strings from a two-digit lookup table.
+    NaN, ±inf and non-numeric cells all become the missing text (the scalar
+    versions raise OverflowError on ±inf), so one bad cell can't break a table.
+    """
+    values = pd.to_numeric(pd.Series(values), errors="coerce")
+    numbers = values.to_numpy(dtype=float, na_value=np.nan)
+    valid = np.isfinite(numbers)
+
+    total_seconds = np.zeros(len(numbers), dtype=np.int64)
+    total_seconds[valid] = np.trunc(numbers[valid] * 3600)
+    negative = total_seconds < 0
+    hours, rest = np.divmod(np.abs(total_seconds), 3600)
+    minutes, seconds = np.divmod(rest, 60)
+
+    hours_text = _TWO_DIGITS[np.minimum(hours, 99)]
+    long_hours = hours > 99
+    if long_hours.any():
+        hours_text[long_hours] = [str(h) for h in hours[long_hours]]
+
+    text = hours_text + ":" + _TWO_DIGITS[minutes] + ":" + _TWO_DIGITS[seconds]
+    if signed:
+        text = np.where(negative, "-", "+").astype(object) + text
+    text[~valid] = missing
+
+    return pd.Series(text, index=values.index, dtype=object)
+
+
+def decimal_to_hhmmss_column(values, missing="❌"):
+    """
+    Column version of decimal_to_hhmmss.
+
+    Parameters:
+        values (pd.Series): Time in decimal hours
+        missing (str): Text used for NaN, ±inf and non-numeric cells
+
+    Returns:
+        pd.Series: '+hh:mm:ss' / '-hh:mm:ss' strings, same index as input
+    """
+    return _hhmmss_column(values, signed=True, missing=missing)
+
+
+def decimal_to_hhmmss_nosign_column(values, missing="❌"):
+    """
+    Column version of decimal_to_hhmmss_nosign.
+
+    Parameters:
+        values (pd.Series): Time in decimal hours
+        missing (str): Text used for NaN, ±inf and non-numeric cells
+
+    Returns:
+        pd.Series: 'hh:mm:ss' strings, same index as input
+    """
+    return _hhmmss_column(values, signed=False, missing=missing)
+
+
 
 
 def time_string_to_decimal(time_str):
@@ -164,6 +250,108 @@ def time_string_to_decimal(time_str):
 
 
 
+def _round3(values):
+    """
+    Rounds a float array to 3 decimals exactly like Python's built-in round().
+
+    np.round only disagrees with round() on values sitting on a .0005 boundary,
+    so those few entries are re-rounded in Python.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, 3)
+    scaled = values * 1000
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        rounded[near_half] = [round(float(v), 3) for v in values[near_half]]
+    return rounded
+
+
+def time_strings_to_decimal(values):
+    """
+    Column-level version of time_string_to_decimal.
+
+    Gives the same result as Series.apply(time_string_to_decimal) for every
+    format it accepts ('HH:MM:SS', plain floats, '2 hours 43 min 30 s', '-', NaN),
+    but parses each distinct cell only once, using Arrow regex kernels.
+
+    Parameters:
+        values (pd.Series): Raw duration cells
+
+    Returns:
+        pd.Series: Time in decimal hours (float), NaN where unparseable
+    """
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values)
+
+    # Already numeric → float(x) is a no-op per cell
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+
+    # Parse unique cells only; NaN/None get code -1
+    codes, uniques = pd.factorize(values)
+    text = pa.array(pd.Series(uniques, dtype=object).astype(str), type=pa.string())
+    parsed = np.full(len(uniques), np.nan)
+
+    def as_float(arr):
+        return pc.cast(arr, pa.float64()).to_numpy(zero_copy_only=False)
+
+    def as_mask(arr):
+        return arr.to_numpy(zero_copy_only=False).astype(bool)
+
+    pending = ~as_mask(pc.equal(pc.utf8_trim_whitespace(text), "-"))
+
+    # Arrow's RE2 and Python's re only agree on plain ASCII; anything else
+    # (unicode digits, odd whitespace) goes through the scalar parser
+    exotic = pending & ~as_mask(pc.match_substring_regex(text, r"^[ -~]*$"))
+    for i in np.flatnonzero(exotic):
+        result = time_string_to_decimal(uniques[i])
+        parsed[i] = np.nan if result is None else result
+    pending &= ~exotic
+
+    # 1) Standard HH:MM:SS strings
+    hms = pc.extract_regex(text, r"^(?P<h>\d{1,2}):(?P<m>\d{2}):(?P<s>\d{2})$")
+    h, m, sec = (as_float(pc.struct_field(hms, f)) for f in ("h", "m", "s"))
+    is_hms = pending & ~np.isnan(h)
+    parsed[is_hms] = _round3(h[is_hms] + m[is_hms] / 60 + sec[is_hms] / 3600)
+    pending &= ~is_hms
+
+    # 2) Direct numeric strings (e.g. '1.5')
+    is_numeric = pending & as_mask(pc.match_substring_regex(
+        text, r"^\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*$"
+    ))
+    numeric_idx = np.flatnonzero(is_numeric)
+    parsed[numeric_idx] = as_float(pc.utf8_trim_whitespace(text.take(numeric_idx)))
+    pending &= ~is_numeric
+
+    # 3) Verbose strings like '2 hours 43 min 30 s'
+    def first_number(pattern):
+        return as_float(pc.struct_field(pc.extract_regex(text, pattern), "v"))
+
+    hours = first_number(r"(?P<v>\d+)\s*hours?")
+    minutes = first_number(r"(?P<v>\d+)\s*min")
+    seconds = first_number(r"(?P<v>\d+)\s*s")
+    no_match = np.isnan(hours) & np.isnan(minutes) & np.isnan(seconds)
+
+    # Other spellings float() accepts ('nan', 'inf', '1_000') have no verbose
+    # match, so only those few cells need a per-cell float() attempt
+    for i in np.flatnonzero(pending & no_match):
+        try:
+            parsed[i] = float(uniques[i])
+            pending[i] = False
+        except (TypeError, ValueError):
+            pass
+
+    parsed[pending] = _round3(
+        np.nan_to_num(hours[pending])
+        + np.nan_to_num(minutes[pending]) / 60
+        + np.nan_to_num(seconds[pending]) / 3600
+    )
+
+    return pd.Series(np.append(parsed, np.nan)[codes], index=values.index, dtype=float)
+
+
+
+
 def convert_time_columns_for_export(df):
     """
     Converts all relevant time-related columns in a DataFrame to hh:mm:ss format with sign.
@@ -180,7 +368,7 @@ def convert_time_columns_for_export(df):
 
     for col in time_cols:
         if col in df.columns:
-            df[col] = df[col].apply(decimal_to_hhmmss)
+            df[col] = decimal_to_hhmmss_column(df[col])
 
     return df
 
@@ -210,6 +398,53 @@ def connect_to_gsheet(sheet_id):
 
 
 
+def prepare_sheet_export(df, report_date):
+    """
+    Builds the frame written to Google Sheets from processed agent rows.
+
+    - Inserts total rows for agents with multiple entries
+    - Takes the mismatch out of Time Connected and formats times as hh:mm:ss
+    - Drops the internal/debug columns
+    - Blanks missing values (categorical columns such as Office are turned
+      into plain text first, since "" is not one of their categories)
+
+    Parameters:
+        df (pd.DataFrame): Processed rows from load_and_process_data (all servers)
+        report_date (datetime): The selected report date
+
+    Returns:
+        pd.DataFrame: Sheet-ready rows (empty if there was nothing to export)
+    """
+    export_df = insert_total_rows(df, report_date)
+    if export_df.empty:
+        return export_df
+
+    export_df = export_df.sort_values(by=["Office", "Agent", "Time Connected"])
+
+    # ✅ Adjust Time Connected by removing mismatch
+    if "_MismatchAmount" in export_df.columns and "Time Connected" in export_df.columns:
+        export_df["Time Connected"] = (
+            export_df["Time Connected"] - export_df["_MismatchAmount"]
+        ).clip(lower=0)
+
+    # Clean time columns: replace empty strings with NaN
+    for col in ["Time To Goal", "Time Connected", "Break", "Talk Time", "Wrap Up"]:
+        if col in export_df.columns:
+            export_df[col] = pd.to_numeric(export_df[col], errors="coerce")
+            if col == "Time To Goal":
+                export_df[col] = decimal_to_hhmmss_column(export_df[col], missing="")
+            else:
+                export_df[col] = decimal_to_hhmmss_nosign_column(export_df[col], missing="")
+
+    # Drop internal/debug columns
+    debug_cols = ["Time Mismatch", "_MismatchAmount", "_TTG_Adjusted", "_MinutesLate", "_PunctualityStatus"]
+    export_df = export_df.drop(columns=[col for col in debug_cols if col in export_df.columns])
+
+    categorical_cols = export_df.select_dtypes(include="category").columns
+    export_df[categorical_cols] = export_df[categorical_cols].astype(object)
+    return export_df.fillna("")
+
+
 def export_df_to_sheet(df, worksheet):
     """
     Writes a DataFrame to a given Google Sheets worksheet using gspread.
@@ -334,17 +569,7 @@ def load_chase_data(df_raw):
     df = df_raw[~df_raw["Agente"].astype(str).str.contains("Total", na=False)].copy()
 
     # 2) Rename exactly the Timesheet headers
-    df = df.rename(columns={
-        "Agente": "Agent",
-        "Hora de Inicio de Sesión": "1st Call",
-        "Hora de Cierre de Sesión":  "Shift End",
-        "Tiempo en Sesión":           "Time Connected",
-        "Duración de Conversación":   "Talk Time",
-        "Duración de Receso":         "Break",
-        "Tiempo de Finalización":     "Wrap Up",
-        # optional, if you ever see it
-        "Ventas/Potencial/Cita":      "Sales",
-    })
+    df = df.rename(columns=CHASE_RENAME_MAP)
 
     # 3) Strip whitespace on Agent
     df["Agent"] = df["Agent"].astype(str).str.strip()
@@ -363,14 +588,14 @@ def load_chase_data(df_raw):
     # 5) Parse every duration column (including Time Connected + Shift End)
     for col in ["Time Connected", "Talk Time", "Break", "Wrap Up", "Shift End"]:
         if col in df.columns:
-            df[col] = df[col].apply(time_string_to_decimal).fillna(0.0)
+            df[col] = time_strings_to_decimal(df[col]).fillna(0.0)
 
     # 6) Ensure 1st Call exists so downstream code can always reference it
     if "1st Call" not in df.columns:
         df["1st Call"] = ""
 
     # 7) Fill in the “mismatch” and debug placeholders
-    df["_MismatchAmount"] = 0
+    df["_MismatchAmount"] = 0.0
     df["Time Mismatch"]   = "✅"
     df["_Debug"]          = ""
 
@@ -387,26 +612,415 @@ def load_chase_data(df_raw):
 #-------------------------------------------------------------------------------------------------------------------------------------------------------------
 ### === DATA INGESTION: DROPBOX / MANUAL ===
 
-def get_latest_dropbox_csv(folder_path, dbx=None):
+# 🗄️ Local cache for downloaded Dropbox CSVs (keyed by content_hash / rev)
+DROPBOX_CACHE_DIR = os.getenv(
+    "DROPBOX_CACHE_DIR", os.path.join(tempfile.gettempdir(), "agent_metrics_dropbox_cache")
+)
+DROPBOX_CACHE_MAX_BYTES = int(os.getenv("DROPBOX_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+DROPBOX_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+
+# 🕒 Timezone used to decide which report day a Dropbox upload belongs to
+REPORT_TIMEZONE = os.getenv("REPORT_TIMEZONE", "America/Mexico_City")
+
+# 📂 Saved list-folder cursor + entry snapshot per Dropbox folder
+DROPBOX_FOLDER_STATE = {}
+_DROPBOX_FOLDER_LOCK = threading.Lock()
+
+
+def report_today(timezone=REPORT_TIMEZONE):
+    """
+    Returns today's date in the office timezone, the day every "today" check
+    (file selection, default report date, archive completeness) is counted in.
+    """
+    return datetime.now(ZoneInfo(timezone)).date()
+
+
+def _dropbox_cache_key(entry):
+    """
+    Returns the cache key for a Dropbox file entry: its content_hash, or its rev
+    when no hash is available. None means the entry cannot be cached.
+    """
+    key = getattr(entry, "content_hash", None) or getattr(entry, "rev", None)
+    if not key:
+        return None
+    return re.sub(r"[^0-9A-Za-z_-]", "_", str(key))
+
+
+def _dropbox_cache_path(cache_dir, key):
+    """
+    Returns the local path of a cached Dropbox CSV.
+    """
+    return os.path.join(cache_dir, f"{key}.csv")
+
+
+def _read_dropbox_cache(cache_dir, key):
+    """
+    Returns cached file bytes for a key (or None), bumping its mtime so the
+    eviction pass treats it as recently used.
+    """
+    path = _dropbox_cache_path(cache_dir, key)
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+        os.utime(path)
+        return content
+    except OSError:
+        return None
+
+
+def _write_dropbox_cache(cache_dir, key, content):
+    """
+    Stores file bytes under a key. Writes to a temp file first so a concurrent
+    reader never sees a partial CSV.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _dropbox_cache_path(cache_dir, key)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _download_dropbox_file(dbx, dropbox_path, local_path):
+    """
+    Streams a Dropbox file straight to disk (never held in memory as a whole).
+    Writes to a temp file first so a concurrent reader never sees a partial CSV.
+    """
+    local_dir = os.path.dirname(local_path)
+    os.makedirs(local_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=local_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        dbx.files_download_to_file(tmp_path, dropbox_path)
+        os.replace(tmp_path, local_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return local_path
+
+
+def _evict_cache_dir(cache_dir, max_bytes, suffix=".csv", keep=()):
+    """
+    Deletes least recently used cache files (by mtime) until the cache fits in max_bytes.
+    Paths in keep (files about to be read) are never removed.
+
+    Returns:
+        int: Number of files removed
+    """
+    keep = {os.path.abspath(path) for path in keep}
+    try:
+        cached = [
+            (entry.stat().st_mtime, entry.stat().st_size, entry.path)
+            for entry in os.scandir(cache_dir)
+            if entry.is_file() and entry.name.endswith(suffix)
+        ]
+    except OSError:
+        return 0
+
+    evicted = 0
+    total = sum(size for _, size, _ in cached)
+    for _, size, path in sorted(cached):
+        if total <= max_bytes:
+            break
+        if os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        evicted += 1
+    return evicted
+
+
+def get_dropbox_cache_stats():
+    """
+    Returns a copy of the Dropbox cache hit/miss/eviction counters.
+    """
+    return dict(DROPBOX_CACHE_STATS)
+
+
+def _dropbox_entry_key(entry):
+    """
+    Returns the key used to track an entry across list-folder deltas.
+    """
+    return (getattr(entry, "path_lower", None) or entry.name).lower()
+
+
+def _list_dropbox_folder(dbx, folder_path):
+    """
+    Lists every entry in a Dropbox folder, incrementally when possible.
+
+    The first call does a full listing (following has_more) and saves the
+    list-folder cursor. Later calls only ask files_list_folder_continue for the
+    entries added, changed or deleted since then and apply them to the saved
+    snapshot. If Dropbox invalidates the cursor, the folder is fully resynced.
+
+    Parameters:
+        dbx (dropbox.Dropbox): Authenticated Dropbox client
+        folder_path (str): Target Dropbox folder path
+
+    Returns:
+        List[dropbox.files.Metadata]: All entries currently in the folder
+    """
+    with _DROPBOX_FOLDER_LOCK:
+        state = DROPBOX_FOLDER_STATE.get(folder_path)
+
+        result = None
+        if state is not None:
+            try:
+                result = dbx.files_list_folder_continue(state["cursor"])
+            except dropbox.exceptions.ApiError as e:
+                # 🔄 Cursor reset by Dropbox → fall back to a full resync
+                if not (isinstance(e.error, dropbox.files.ListFolderContinueError) and e.error.is_reset()):
+                    raise
+                state = None
+
+        if state is None:
+            state = {"cursor": None, "entries": {}}
+            result = dbx.files_list_folder(folder_path)
+
+        entries = dict(state["entries"])
+        while True:
+            for entry in result.entries:
+                if isinstance(entry, dropbox.files.DeletedMetadata):
+                    entries.pop(_dropbox_entry_key(entry), None)
+                else:
+                    entries[_dropbox_entry_key(entry)] = entry
+            if not result.has_more:
+                break
+            result = dbx.files_list_folder_continue(result.cursor)
+
+        # Only save the snapshot once the whole delta has been applied
+        DROPBOX_FOLDER_STATE[folder_path] = {"cursor": result.cursor, "entries": entries}
+        return list(entries.values())
+
+
+# 🕳️ Cells read as missing (same set pandas.read_csv uses by default)
+CSV_NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def _sniff_csv_schema(header_columns):
+    """
+    Decides which report a CSV is from its header row alone.
+
+    Parameters:
+        header_columns (List[str]): Column names from the first line of the file
+
+    Returns:
+        str | None: "chase", "readymode", or None for an unknown layout
+    """
+    if "Agente" in header_columns:
+        return "chase"
+    if "Login ID" in header_columns:
+        return "readymode"
+    return None
+
+
+def _report_columns(header_line, name=None):
+    """
+    Parses a raw CSV header line and returns (schema, usecols).
+
+    Raises:
+        ValueError: If the header matches no known report layout
+    """
+    header = next(csv.reader([header_line.decode("utf-8-sig", errors="replace").rstrip("\r\n")]), [])
+    schema = _sniff_csv_schema(header)
+    if schema is None:
+        raise ValueError(f"Unrecognized CSV header in {name or 'file'}: {header[:8]}")
+
+    rename_map = CHASE_RENAME_MAP if schema == "chase" else COLUMN_RENAME_MAP
+    return schema, [col for col in header if col in rename_map]
+
+
+def read_report_header(source, name=None):
+    """
+    Reads only the header line of a report CSV and validates it.
+
+    Parameters:
+        source (str | bytes | file-like): Path, raw bytes, BytesIO or Streamlit UploadedFile
+        name (str): File name used in error messages
+
+    Returns:
+        Tuple[str, List[str]]: Schema ("readymode" / "chase") and the columns to read
+
+    Raises:
+        ValueError: If the header matches no known report layout
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            header_line = f.readline()
+    elif isinstance(source, (bytes, bytearray)):
+        header_line = bytes(source).split(b"\n", 1)[0]
+    else:
+        source.seek(0)
+        header_line = source.readline()
+        source.seek(0)
+    return _report_columns(header_line, name or getattr(source, "name", None))
+
+
+def read_report_csv(source, name=None):
+    """
+    Reads a ReadyMode or Chase CSV with a declared schema.
+
+    Only the header line is sniffed first to pick the schema; files with an
+    unknown header are rejected before the body is parsed. The body is then
+    read with usecols limited to the renamed columns and every column kept as
+    text (the time/number parsers downstream do the typing). Uses the pyarrow
+    CSV reader, falling back to the pandas C engine for files it can't parse
+    (e.g. footer rows with fewer fields).
+
+    Parameters:
+        source (str | bytes | file-like): Path, raw bytes, BytesIO or Streamlit UploadedFile
+        name (str): File name used in error messages
+
+    Returns:
+        pd.DataFrame: Raw report with its original column names
+    """
+    if isinstance(source, (str, os.PathLike)):
+        name = name or os.path.basename(source)
+        with open(source, "rb") as f:
+            data = f.read()
+    elif isinstance(source, (bytes, bytearray)):
+        data = bytes(source)
+    else:
+        name = name or getattr(source, "name", None)
+        source.seek(0)
+        data = source.read()
+
+    # 🔎 Sniff the header line only
+    _, usecols = _report_columns(data.split(b"\n", 1)[0], name)
+    dtype = {col: str for col in usecols}
+
+    try:
+        table = pa_csv.read_csv(
+            BytesIO(data),
+            convert_options=pa_csv.ConvertOptions(
+                include_columns=usecols,
+                column_types={col: pa.string() for col in usecols},
+                null_values=CSV_NA_VALUES,
+                strings_can_be_null=True,
+            ),
+        )
+        # Arrow nulls arrive as None; use NaN like read_csv does
+        columns = {}
+        for col, array in zip(table.column_names, table.columns):
+            values = array.to_numpy(zero_copy_only=False)
+            if array.null_count:
+                values[array.is_null().to_numpy(zero_copy_only=False)] = np.nan
+            columns[col] = values
+        return pd.DataFrame(columns, columns=table.column_names)
+    except pa.ArrowException:
+        return pd.read_csv(BytesIO(data), usecols=usecols, dtype=dtype)
+
+
+def server_number_from_filename(file_name):
+    """
+    Returns the ReadyMode server number in a file name ("...automation12..." → "12"),
+    or None when the name carries no server number.
+    """
+    match = re.search(r"automation(\d+)", file_name.lower())
+    return match.group(1) if match else None
+
+
+def _select_report_files(entries, report_date, timezone=REPORT_TIMEZONE):
+    """
+    Picks the files to load for a report date using listing metadata only.
+
+    Keeps CSVs whose server_modified falls on report_date (in the office
+    timezone), then keeps the newest file per source: one per ReadyMode server
+    ("automationN" in the name), one Chase file ("chase" in the name), and one
+    per file name for anything else. Files with the same content_hash as a
+    newer pick (duplicate uploads) are dropped.
+
+    Parameters:
+        entries (List[dropbox.files.Metadata]): Folder listing
+        report_date (date | datetime): The selected report date
+        timezone (str): IANA timezone the report day is counted in
+
+    Returns:
+        List[dropbox.files.FileMetadata]: Selected files, newest first
+    """
+    tz = ZoneInfo(timezone)
+    day = pd.Timestamp(report_date).date()
+
+    def local_date(entry):
+        modified = entry.server_modified
+        if modified.tzinfo is None:
+            modified = modified.replace(tzinfo=dt_timezone.utc)
+        return modified.astimezone(tz).date()
+
+    candidates = sorted(
+        [
+            f for f in entries
+            if f.name.endswith(".csv") and getattr(f, "server_modified", None) is not None
+            and local_date(f) == day
+        ],
+        key=lambda x: x.server_modified,
+        reverse=True
+    )
+
+    selected = []
+    seen_sources = set()
+    seen_hashes = set()
+    for f in candidates:
+        server_number = server_number_from_filename(f.name)
+        if server_number is not None:
+            source = f"Server {server_number}"
+        elif "chase" in f.name.lower():
+            source = "Chase"
+        else:
+            source = f.name.lower()
+
+        content_hash = getattr(f, "content_hash", None)
+        if source in seen_sources or (content_hash and content_hash in seen_hashes):
+            continue
+        seen_sources.add(source)
+        if content_hash:
+            seen_hashes.add(content_hash)
+        selected.append(f)
+
+    return selected
+
+
+def get_latest_dropbox_csv(folder_path, dbx=None, max_workers=8,
+                           cache_dir=DROPBOX_CACHE_DIR, cache_max_bytes=DROPBOX_CACHE_MAX_BYTES,
+                           report_date=None, stream_threshold_bytes=None):
     """
     Fetches the latest CSV files from a Dropbox folder.
 
     Connects using environment credentials (or a pre-injected client for testing),
     sorts by last modified date (most recent first), and returns a list of
-    (filename, BytesIO) tuples.
+    (filename, BytesIO) tuples. With a report_date, only the newest file per
+    server for that day is kept (see _select_report_files) before anything is
+    downloaded. Files whose content_hash/rev is already in the
+    local cache are served from disk; the rest are downloaded concurrently on a
+    bounded thread pool that shares the one client.
+
+    Files larger than stream_threshold_bytes (by their listing size) are never
+    loaded into memory: they are downloaded straight to disk and returned as a
+    local path, so load_and_process_data can stream them in chunks.
 
     Parameters:
         folder_path (str): Target Dropbox folder path (e.g. '/ReadyModeReports')
         dbx (dropbox.Dropbox): Optional pre-authenticated Dropbox client
+        max_workers (int): Maximum number of simultaneous downloads
+        cache_dir (str | None): Local cache directory (None disables the cache)
+        cache_max_bytes (int): Cache size limit; least recently used files are evicted
+        report_date (date | None): Only fetch the files for this report date (None = every CSV)
+        stream_threshold_bytes (int | None): Return files above this size as local paths (None = never)
 
     Returns:
-        List[Tuple[str, BytesIO]]: List of filenames and file content
+        List[Tuple[str, BytesIO | str]]: List of filenames and file content (or local path)
     """
 
-
-    #print("🔌 Dropbox client initialized")
-
-
     # 🔐 Load Dropbox client if not provided
     if dbx is None:
         dbx = dropbox.Dropbox(
@@ -417,31 +1031,72 @@ def get_latest_dropbox_csv(folder_path, dbx=None):
             timeout=5  # ← add this line
         )
 
-    #print(f"📦 Attempting to list files in: {folder_path}")
-    entries = dbx.files_list_folder(folder_path).entries
-   #print(f"✅ Found {len(entries)} files in Dropbox folder")
-
     try:
-        # Fetch all entries and filter CSVs
-        entries = dbx.files_list_folder(folder_path).entries
-        csv_files = sorted(
-            [f for f in entries if f.name.endswith(".csv")],
-            key=lambda x: x.server_modified,
-            reverse=True
-        )
-        if not csv_files:
+        # Fetch all entries (every page) and keep CSVs, newest first
+        entries = _list_dropbox_folder(dbx, folder_path)
+        if report_date is not None:
+            sorted_files = _select_report_files(entries, report_date)
+        else:
+            sorted_files = sorted(
+                [f for f in entries if f.name.endswith(".csv")],
+                key=lambda x: x.server_modified,
+                reverse=True
+            )
+        if not sorted_files:
             return []
 
-        # Sort CSVs by modified time (newest first)
-        sorted_files = sorted(csv_files, key=lambda x: x.server_modified, reverse=True)
+        def streamed(csv_file):
+            size = getattr(csv_file, "size", None)
+            return stream_threshold_bytes is not None and size is not None and size > stream_threshold_bytes
 
-        # Download and buffer content
-        file_list = []
+        # 🗄️ Serve unchanged files from the local cache
+        contents = {}
+        to_download = []
         for csv_file in sorted_files:
-            _, res = dbx.files_download(f"{folder_path}/{csv_file.name}")
-            file_list.append((csv_file.name, BytesIO(res.content)))
-
-        return file_list
+            key = _dropbox_cache_key(csv_file) if cache_dir else None
+            if key and streamed(csv_file):
+                cached = _dropbox_cache_path(cache_dir, key)  # read later, straight from disk
+                if os.path.exists(cached):
+                    os.utime(cached)
+                else:
+                    cached = None
+            else:
+                cached = _read_dropbox_cache(cache_dir, key) if key else None
+            if cached is not None:
+                DROPBOX_CACHE_STATS["hits"] += 1
+                contents[csv_file.name] = cached
+            else:
+                DROPBOX_CACHE_STATS["misses"] += 1
+                to_download.append((csv_file, key))
+
+        def download(item):
+            csv_file, key = item
+            dropbox_path = f"{folder_path}/{csv_file.name}"
+            if streamed(csv_file):
+                # 🌊 Large file: straight to disk, handed on as a path
+                local_path = (
+                    _dropbox_cache_path(cache_dir, key) if key
+                    else os.path.join(tempfile.gettempdir(), "agent_metrics_stream", csv_file.name)
+                )
+                return csv_file.name, _download_dropbox_file(dbx, dropbox_path, local_path)
+            _, res = dbx.files_download(dropbox_path)
+            if key:
+                _write_dropbox_cache(cache_dir, key, res.content)
+            return csv_file.name, res.content
+
+        # Download new/modified files concurrently
+        if to_download:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(to_download)))) as pool:
+                contents.update(pool.map(download, to_download))
+            if cache_dir:
+                local_paths = [content for content in contents.values() if isinstance(content, str)]
+                DROPBOX_CACHE_STATS["evictions"] += _evict_cache_dir(cache_dir, cache_max_bytes, keep=local_paths)
+
+        # Buffer content (newest first); streamed files stay on disk
+        return [
+            (f.name, contents[f.name] if isinstance(contents[f.name], str) else BytesIO(contents[f.name]))
+            for f in sorted_files
+        ]
 
     except Exception as e:
         raise RuntimeError(f"Dropbox error: {e}")
@@ -455,41 +1110,50 @@ def get_latest_dropbox_csv(folder_path, dbx=None):
 #-------------------------------------------------------------------------------------------------------------------------------------------------------------
 ### === TIME RULES / GOALS ===
 
-def get_daily_time_goals(report_date):
+# 🔹 Special hard-coded West agents (Egypt schedule on Fridays)
+EGYPT_WEST_AGENTS = {"w atef", "w duha", "w fadi", "w mahmoud", "w ragb", "w atya"}
+
+# 🎯 Goal columns added by get_daily_time_goal_columns (same order as get_daily_time_goals)
+GOAL_COLUMNS = ["_GoalTime", "_BreakLimit", "_WrapLimit", "_TalkGoal", "_ShiftStart"]
+
+
+def get_daily_time_goals(report_date, agent=None, office=None):
     """
     Returns expected performance metrics based on the day of the week.
     Egypt office uses Mon–Thu metrics on Friday as well.
     West office has specific agents that also follow the Egypt Friday schedule.
     Prime office agents (prefix "pr ") work 30 minutes more Mon–Fri.
-    """
-    try:
-        caller = inspect.stack()[1].frame
-        agent_name = caller.f_locals.get("agent") or caller.f_locals.get("row", {}).get("Agent") \
-                     or caller.f_locals.get("row", {}).get("agent") or None
-    except Exception:
-        agent_name = None
 
-    is_commercial = False
-    office = None
-    if isinstance(agent_name, str):
-        office = classify_office(agent_name)
-        is_commercial = office == "Commercial"
-        agent_name = agent_name.lower().strip()
-    else:
-        agent_name = None
+    Parameters:
+        report_date (datetime): The selected report date
+        agent (str, optional): Agent name; None gives the default office goals
+        office (str, optional): Office of the agent; classified from the name if omitted
+
+    Returns:
+        Tuple: (goal_time, break_limit, wrap_limit, talk_goal, shift_start)
+    """
+    agent_name = agent.lower().strip() if isinstance(agent, str) else None
+    if not isinstance(office, str):
+        office = classify_office(agent) if isinstance(agent, str) else None
 
     weekday = report_date.weekday()  # Monday = 0, Sunday = 6
 
-    # 🔹 Special hard-coded West agents (Egypt schedule on Fridays)
-    egypt_west_agents = {"w atef", "w duha", "w fadi", "w mahmoud", "w ragb", "w atya"}
+    return _resolve_daily_time_goals(
+        weekday,
+        office,
+        isinstance(agent_name, str) and agent_name.startswith("pr "),
+        office == "Commercial",
+        weekday == 4 and (office == "Egypt" or agent_name in EGYPT_WEST_AGENTS),
+    )
 
-    # 🟢 Egypt override: Friday acts like Thursday
-    if (office == "Egypt" and weekday == 4) or \
-       (weekday == 4 and agent_name in egypt_west_agents):
-        weekday = 3  
 
-    # 🔵 Prime agent flag (prefix "pr ")
-    is_prime = isinstance(agent_name, str) and agent_name.startswith("pr ")
+@lru_cache(maxsize=None)
+def _resolve_daily_time_goals(weekday, office, is_prime, is_commercial, is_egypt_friday):
+    """Memoized goal table behind get_daily_time_goals."""
+
+    # 🟢 Egypt override: Friday acts like Thursday
+    if is_egypt_friday:
+        weekday = 3
 
     # Mon–Thu
     if weekday in [0, 1, 2, 3]:
@@ -497,8 +1161,6 @@ def get_daily_time_goals(report_date):
         goal_time = 10 if is_prime else 9.5
         return goal_time, 2 + 20/60, wrap_limit, 4.5, "07:45"
 
-        
-
     # Friday
     elif weekday == 4:
         wrap_limit = 1.5 if is_commercial else 0.75
@@ -509,7 +1171,6 @@ def get_daily_time_goals(report_date):
     elif weekday == 5:
         wrap_limit = 0.75
         return 6, 1, wrap_limit, 2.75, "07:45"
-        
 
     # Sunday
     elif weekday == 6:
@@ -517,138 +1178,348 @@ def get_daily_time_goals(report_date):
         return 5.0, 1.0, 0.75, None, "09:00"
 
 
-
-def get_bar_color(metric, percent):
-    """
-    Assigns intuitive colors for chart bars based on goal vs limit logic.
-    - Green = good
-    - Yellow = close to threshold
-    - Orange = warning
-    - Red = fail
+def get_daily_time_goal_columns(df, report_date):
     """
-    try:
-        pct = percent / 100.0
+    Resolves get_daily_time_goals for every row of a DataFrame at once.
 
-        if metric in ["Break", "Wrap Up"]:  # Limit-based (lower is better)
-            if pct < 0.5:
-                return "#00FF6E"   # Green
-            elif pct < 0.75:
-                return "#FFD700"   # Yellow
-            elif pct < 0.95:
-                return "#FF8C00"   # Orange
-            else:
-                return "#FF3B3B"   # Red
+    Rows are reduced to their distinct (office, prime, commercial, Egypt-Friday)
+    keys, each key is looked up once, and the goals are broadcast back.
 
-        else:  # Goal-based (higher is better)
-            if pct >= 0.95:
-                return "#00FF6E"   # Green
-            elif pct >= 0.75:
-                return "#FFD700"   # Yellow
-            elif pct >= 0.5:
-                return "#FF8C00"   # Orange
-            else:
-                return "#FF3B3B"   # Red
+    Parameters:
+        df (pd.DataFrame): Rows with an 'Agent' column (and 'Office' if available)
+        report_date (datetime): The selected report date
 
-    except:
-        return "#999999"  # Gray fallback on error
+    Returns:
+        pd.DataFrame: GOAL_COLUMNS aligned to df.index
+    """
+    weekday = report_date.weekday()
+    agents = df["Agent"]
+    names = agents.where(agents.map(type) == str).str.lower().str.strip()
+
+    office = classify_offices(agents).astype(object)
+    if "Office" in df.columns:
+        given = df["Office"].astype(object)
+        office = given.where(given.map(type) == str, office)
+
+    is_prime = names.str.startswith("pr ").fillna(False).astype(bool).to_numpy()
+    is_commercial = (office == "Commercial").to_numpy()
+    is_egypt_friday = ((weekday == 4) & ((office == "Egypt") | names.isin(EGYPT_WEST_AGENTS))).to_numpy()
+
+    # Pack (office, prime, commercial, Egypt-Friday) into one integer key
+    office_codes, office_names = pd.factorize(office)
+    packed = office_codes * 8 + is_prime * 4 + is_commercial * 2 + is_egypt_friday
+    codes, unique_keys = pd.factorize(packed)
+
+    table = np.array(
+        [
+            _resolve_daily_time_goals(
+                weekday, office_names[key // 8], bool(key & 4), bool(key & 2), bool(key & 1)
+            )
+            for key in unique_keys
+        ],
+        dtype=object,
+    ).reshape(-1, len(GOAL_COLUMNS))
 
-def calculate_ttg_value(tc, br, wr, mismatch_amount, report_date):
-    """Calculate Time To Goal for aggregated rows."""
-    goal_time, break_limit, wrap_limit, _, _ = get_daily_time_goals(report_date)
+    goals = pd.DataFrame(table[codes], columns=GOAL_COLUMNS, index=df.index)
+    for col in GOAL_COLUMNS[:-1]:
+        goals[col] = pd.to_numeric(goals[col], errors="coerce")
+    return goals
+
+
+def minutes_late_column(df, report_date):
+    """
+    Minutes between each row's 1st Call and its shift start, for every row at once.
+
+    Same rule as the punctuality checks in the exports: the 1st Call (e.g.
+    "Jul 21 7:42AM") is read with the report year and compared with that day's
+    shift start. Negative means early; NaN means the clock-in can't be parsed.
+
+    Parameters:
+        df (pd.DataFrame): Rows with 'Agent' and '1st Call' columns
+        report_date (datetime): The selected report date
+
+    Returns:
+        pd.Series: Minutes late aligned to df.index
+    """
+    year = pd.Timestamp(report_date).year
+    first_call = df["1st Call"].astype(object)
+    first_call = first_call.where(first_call.map(type) == str)
+
+    # Parse each distinct clock-in once (fixed format first, free-form for the rest)
+    codes, uniques = pd.factorize(first_call)
+    texts = pd.Index(uniques, dtype=object) + f" {year}"
+    parsed = pd.Series(pd.to_datetime(texts, format="%b %d %I:%M%p %Y", errors="coerce"))
+    for i in np.flatnonzero(parsed.isna()):
+        try:
+            parsed.iloc[i] = pd.to_datetime(texts[i])
+        except (ValueError, TypeError, OverflowError):
+            pass
+    parsed = pd.to_datetime(parsed, errors="coerce")
+    call_minutes = (parsed.dt.hour * 60 + parsed.dt.minute + parsed.dt.second / 60).to_numpy(dtype=float)
+
+    shift = pd.to_datetime(
+        get_daily_time_goal_columns(df, report_date)["_ShiftStart"], format="%H:%M", errors="coerce"
+    )
+    shift_minutes = (shift.dt.hour * 60 + shift.dt.minute).to_numpy(dtype=float)
+
+    late = np.append(call_minutes, np.nan)[codes] - shift_minutes
+    return pd.Series(late, index=df.index)
+
+
+
+# 🚦 Clock-in punctuality columns added once at ingestion
+PUNCTUALITY_COLUMNS = ["_MinutesLate", "_PunctualityStatus"]
+
+
+def add_punctuality_columns(df, report_date):
+    """
+    Adds _MinutesLate and _PunctualityStatus to a DataFrame of agent rows.
+
+    _PunctualityStatus is "On time" (at or before shift start), "Just made it"
+    (up to 5 minutes late) or "Late"; it is None when the clock-in can't be
+    parsed. Consumers read these columns instead of re-parsing 1st Call.
+
+    Parameters:
+        df (pd.DataFrame): Rows with 'Agent' and '1st Call' columns
+        report_date (datetime): The selected report date
+
+    Returns:
+        pd.DataFrame: The same DataFrame with both columns set
+    """
+    minutes_late = minutes_late_column(df, pd.Timestamp(report_date))
+    status = np.select(
+        [minutes_late <= 0, minutes_late <= 5, minutes_late > 5],
+        ["On time", "Just made it", "Late"],
+        default=None,
+    )
+    df["_MinutesLate"] = minutes_late
+    df["_PunctualityStatus"] = pd.Series(status, index=df.index, dtype=object)
+    return df
+
+
+def format_punctuality_delay(minutes_late):
+    """
+    Formats minutes early/late as "12 min" or "1h 5m" (whole minutes, sign dropped).
+    """
+    mins = abs(int(minutes_late))
+    return f"{mins} min" if mins < 60 else f"{mins//60}h {mins%60}m"
 
-    extra_break = max(0, br - break_limit)
-    extra_wrap = max(0, wr - wrap_limit)
 
-    available_break = max(0, break_limit - br)
-    available_wrap = max(0, wrap_limit - wr)
 
-    wrap_offset = min(extra_wrap, available_break)
-    break_offset = min(extra_break, available_wrap)
+def get_bar_color(metric, percent):
+    """
+    Assigns intuitive colors for chart bars based on goal vs limit logic.
+    - Green = good
+    - Yellow = close to threshold
+    - Orange = warning
+    - Red = fail
+    """
+    try:
+        pct = percent / 100.0
+
+        if metric in ["Break", "Wrap Up"]:  # Limit-based (lower is better)
+            if pct < 0.5:
+                return "#00FF6E"   # Green
+            elif pct < 0.75:
+                return "#FFD700"   # Yellow
+            elif pct < 0.95:
+                return "#FF8C00"   # Orange
+            else:
+                return "#FF3B3B"   # Red
+
+        else:  # Goal-based (higher is better)
+            if pct >= 0.95:
+                return "#00FF6E"   # Green
+            elif pct >= 0.75:
+                return "#FFD700"   # Yellow
+            elif pct >= 0.5:
+                return "#FF8C00"   # Orange
+            else:
+                return "#FF3B3B"   # Red
 
-    extra_wrap -= wrap_offset
-    extra_break -= break_offset
+    except:
+        return "#999999"  # Gray fallback on error
+
+def calculate_ttg_columns(time_connected, break_time, wrap_up, mismatch_amount,
+                          goal_time, break_limit, wrap_limit):
+    """
+    Vectorized Time To Goal shared by ReadyMode, Chase and total rows.
+
+    Extra Break can be offset by unused Wrap Up and vice versa (only once each);
+    whatever is left over, plus any shift mismatch, is taken off Time Connected.
+    Every argument is an array (or scalar) of decimal hours; missing Break /
+    Wrap Up values count as neither extra nor available time.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Time To Goal and the _TTG_Adjusted flags
+    """
+    tc, br, wr, mismatch, goal, break_limit, wrap_limit = (
+        np.asarray(v, dtype=float)
+        for v in (time_connected, break_time, wrap_up, mismatch_amount,
+                  goal_time, break_limit, wrap_limit)
+    )
+
+    extra_break = np.fmax(0, br - break_limit)
+    extra_wrap = np.fmax(0, wr - wrap_limit)
+
+    available_break = np.fmax(0, break_limit - br)
+    available_wrap = np.fmax(0, wrap_limit - wr)
+
+    # Apply cross-compensation: only once each
+    extra_wrap = extra_wrap - np.minimum(extra_wrap, available_break)
+    extra_break = extra_break - np.minimum(extra_break, available_wrap)
 
     total_penalty = extra_break + extra_wrap
 
-    ttg = (tc - goal_time - total_penalty) - mismatch_amount
-    adjusted = mismatch_amount > 0
+    ttg = (tc - goal - total_penalty) - mismatch
+    adjusted = mismatch > 0
     return ttg, adjusted
 
 
-def format_mismatch(mismatch_amount):
-    if mismatch_amount > 0:
-        return f"⚠️ +{decimal_to_hhmmss_nosign(mismatch_amount)}"
-    return "✅"
+def add_time_to_goal(df, report_date, include_mismatch=True):
+    """
+    Adds 'Time To Goal' and '_TTG_Adjusted' columns to a DataFrame.
+
+    Goals are resolved per row via get_daily_time_goal_columns.
+
+    Parameters:
+        df (pd.DataFrame): Rows with Agent, Time Connected, Break, Wrap Up
+        report_date (datetime): The selected report date
+        include_mismatch (bool): Penalize '_MismatchAmount' (False for Chase)
+
+    Returns:
+        pd.DataFrame: Updated DataFrame
+    """
+    goals = get_daily_time_goal_columns(df, report_date)
+
+    def column(name):
+        return df[name] if name in df.columns else 0
+
+    ttg, adjusted = calculate_ttg_columns(
+        column("Time Connected"),
+        column("Break"),
+        column("Wrap Up"),
+        column("_MismatchAmount") if include_mismatch else 0,
+        goals["_GoalTime"],
+        goals["_BreakLimit"],
+        goals["_WrapLimit"],
+    )
+    df["Time To Goal"] = ttg
+    df["_TTG_Adjusted"] = adjusted
+    return df
 
 
 def insert_total_rows(df, report_date):
-    """Insert aggregated total rows for agents with duplicates."""
-    result = []
+    """
+    Insert aggregated total rows for agents with duplicates.
+
+    Rows are regrouped by agent (first-appearance order) and every agent with
+    more than one row gets a Total row right after its own rows. Totals are
+    built with one groupby: durations, Sales and _MismatchAmount are summed,
+    1st Call takes the earliest value and Shift End the latest, and Time To
+    Goal is recomputed column-wise on the summed values.
+
+    Parameters:
+        df (pd.DataFrame): Processed agent rows (may span several servers)
+        report_date (datetime): The selected report date
+
+    Returns:
+        pd.DataFrame: Rows with totals interleaved, indexed from 1
+    """
     numeric_cols = [
         "Time Connected", "Break", "Talk Time", "Wrap Up", "Sales", "_MismatchAmount"
     ]
 
-    for agent, group in df.groupby("Agent", sort=False):
-        for _, row in group.iterrows():
-            result.append(row.to_dict())
-
-        if len(group) > 1:
-            print(f"🧪 GROUPED AGENT: {agent}")
-            print(group[["Agent", "Sales", "Break", "Wrap Up", "Talk Time", "Time Connected"]])
-
-            print(f"➡️ Creating TOTAL row for: {agent}")
-            print("RAW SALES:", group["Sales"].tolist())
-            print("RAW BREAK:", group["Break"].tolist())
-            print("RAW WRAP:", group["Wrap Up"].tolist())
-            print("RAW TALK:", group["Talk Time"].tolist())
-            print("RAW TC:", group["Time Connected"].tolist())
-
-            total_row = group.iloc[-1].copy()
-
-            for col in numeric_cols:
-                if col in group.columns:
-                    clean_vals = pd.to_numeric(group[col], errors="coerce").fillna(0)
-                    total_row[col] = int(clean_vals.sum()) if col == "Sales" else clean_vals.sum()
-
-
-            
-
-
-            if "1st Call" in group.columns:
-                try:
-                    total_row["1st Call"] = group["1st Call"].min()
-                except Exception:
-                    pass
-            if "Shift End" in group.columns:
-                try:
-                    total_row["Shift End"] = group["Shift End"].max()
-                except Exception:
-                    pass
-
-            mismatch_sum = total_row.get("_MismatchAmount", 0)
-            total_row["Time Mismatch"] = format_mismatch(mismatch_sum)
-
-            agent = total_row.get("Agent")  # 🔹 make agent visible for inspect.stack()
-            ttg, adjusted = calculate_ttg_value(
-                total_row.get("Time Connected", 0),
-                total_row.get("Break", 0),
-                total_row.get("Wrap Up", 0),
-                mismatch_sum,
-                report_date,
-            )
-
-
-            print(f"🧪 GROUPED AGENT: {agent}")
-            print(group[["Agent", "Sales", "Break", "Wrap Up", "Talk Time", "Time Connected"]])
+    # Processed frames can carry "Server" twice; keep one copy of each column
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    # Rows without an Agent are dropped, like groupby("Agent") does
+    codes, _ = pd.factorize(df["Agent"])
+    rows = df[codes >= 0]
+    codes = codes[codes >= 0]
+
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes, minlength=1)
+    multi = np.flatnonzero(counts > 1)
+
+    if not len(multi):
+        new_df = rows.iloc[order].copy()
+        new_df.index = range(1, len(new_df) + 1)
+        return new_df
+
+    # Totals start as a copy of each agent's last row
+    last_position = pd.Series(np.arange(len(rows))).groupby(codes).max().to_numpy()
+    totals = rows.iloc[last_position[multi]].copy()
+
+    agg_input = pd.DataFrame(index=range(len(rows)))
+    agg_spec = {}
+    for col in numeric_cols:
+        if col in rows.columns:
+            agg_input[col] = pd.to_numeric(rows[col], errors="coerce").fillna(0).to_numpy()
+            agg_spec[col] = (col, "sum")
+
+    # Text times are aggregated through their sorted rank; they only compare
+    # cleanly when a group is all strings, other groups keep the last row's value
+    comparable = {}
+    ranked = {}
+    for col, how in [("1st Call", "min"), ("Shift End", "max")]:
+        if col in rows.columns:
+            values = rows[col]
+            if values.dtype == object:
+                is_text = values.map(type).eq(str)
+                comparable[col] = is_text.groupby(codes).all().to_numpy()[multi]
+                values, ranked[col] = pd.factorize(values.where(is_text, ""), sort=True)
+            agg_input[col] = np.asarray(values)
+            agg_spec[col] = (col, how)
+
+    sums = agg_input.groupby(codes).agg(**agg_spec).iloc[multi]
+
+    for col in agg_spec:
+        values = sums[col].to_numpy()
+        if col == "Sales":
+            values = values.astype(int)
+        if col in ranked:
+            values = np.asarray(ranked[col], dtype=object)[values]
+        if col in comparable:
+            values = np.where(comparable[col], values, totals[col].to_numpy())
+        totals[col] = values
+
+    if "_MismatchAmount" in totals.columns:
+        mismatch_sum = totals["_MismatchAmount"].astype(float)
+    else:
+        mismatch_sum = pd.Series(0.0, index=totals.index)
+    totals["Time Mismatch"] = np.where(
+        mismatch_sum > 0,
+        "⚠️ +" + decimal_to_hhmmss_nosign_column(mismatch_sum).to_numpy(),
+        "✅",
+    )
 
-            total_row["Time To Goal"] = ttg
-            total_row["_TTG_Adjusted"] = adjusted
-            total_row["is_total"] = True
-            total_row["Server"] = "Total"
+    goals = get_daily_time_goal_columns(totals, report_date)
 
-            result.append(total_row.to_dict())
+    def column(name):
+        return totals[name] if name in totals.columns else 0
 
-    new_df = pd.DataFrame(result)
+    ttg, adjusted = calculate_ttg_columns(
+        column("Time Connected"),
+        column("Break"),
+        column("Wrap Up"),
+        mismatch_sum,
+        goals["_GoalTime"],
+        goals["_BreakLimit"],
+        goals["_WrapLimit"],
+    )
+    totals["Time To Goal"] = ttg
+    totals["_TTG_Adjusted"] = adjusted
+    if "_MinutesLate" in totals.columns:
+        # Totals clock in at the agent's earliest 1st Call
+        totals = add_punctuality_columns(totals, report_date)
+    totals["is_total"] = True
+    totals["Server"] = "Total"
+
+    # Interleave: each agent's rows, then its total
+    sort_key = np.concatenate([codes[order] * 2, multi * 2 + 1])
+    new_df = pd.concat([rows.iloc[order], totals])
+    new_df = new_df.iloc[np.argsort(sort_key, kind="stable")]
     new_df.index = range(1, len(new_df) + 1)
     return new_df
 
@@ -677,6 +1548,40 @@ COLUMN_RENAME_MAP = {
     "Ready:Wrap Time": "Wrap Up"
 }
 
+# 🔁 Chase Timesheet headers → internal names ("Agente" marks a Chase file)
+CHASE_RENAME_MAP = {
+    "Agente": "Agent",
+    "Hora de Inicio de Sesión": "1st Call",
+    "Hora de Cierre de Sesión":  "Shift End",
+    "Tiempo en Sesión":           "Time Connected",
+    "Duración de Conversación":   "Talk Time",
+    "Duración de Receso":         "Break",
+    "Tiempo de Finalización":     "Wrap Up",
+    # optional, if you ever see it
+    "Ventas/Potencial/Cita":      "Sales",
+}
+
+# 🏢 Agents billed to the Commercial office regardless of prefix
+COMMERCIAL_AGENTS = {
+    "sp tony", "sp allan", "sp chris", "sp mathew", "sp steve", "w retano", "sp jennifer1", "sp tom1"
+}
+
+# 🏢 Login ID prefix → office (add new offices here)
+OFFICE_PREFIXES = {
+    "n ": "Tepic",
+    "a ": "Army",
+    "w ": "West",
+    "sp ": "Sp & Prime",
+    "pr ": "Sp & Prime",
+    "e ": "Egypt",
+    "s ": "Spanish",
+    "g ": "Tigers",
+    "v ": "CDMX",
+}
+
+# 🏢 Categories of the Office column, alphabetical so sorting matches plain strings
+OFFICE_CATEGORIES = sorted(set(OFFICE_PREFIXES.values()) | {"Commercial", "Other"})
+
 # 🎯 Column order used for displaying processed data (UI and exports)
 DISPLAY_COLUMN_ORDER = [
     "Sales", "Server", "1st Call", "Shift End", "Agent", "Time To Goal", "Time Connected",
@@ -698,9 +1603,10 @@ def detect_inconsistencies(df):
 
     - Uses 1st Call and Shift End as reference points.
     - Calculates max possible shift time and compares to Time Connected.
+    - Parses both clock columns with a fixed '%I:%M%p' format in one pass.
     - Adds three columns:
         - 'Time Mismatch' (✅ or ⚠️ +HH:MM:SS)
-        - '_Debug' (internal trace string)
+        - '_Debug' (internal trace string, only for rows that could not be checked)
         - '_MismatchAmount' (excess time in decimal hours)
 
     Parameters:
@@ -710,88 +1616,470 @@ def detect_inconsistencies(df):
         pd.DataFrame: Updated DataFrame with mismatch flags and debug columns
     """
 
-    def check_mismatch(row):
+    # 🕒 Minutes since midnight from the time part (drop date); each distinct
+    #    cell is parsed once, unparseable ones (or NaN) become NaN
+    def clock_minutes(col):
+        if col not in df.columns:
+            return np.full(len(df), np.nan)
+        codes, uniques = pd.factorize(df[col])
+        last_token = pd.Series(uniques, dtype=object).astype(str).str.split().str[-1]
+        parsed = pd.to_datetime(last_token, format="%I:%M%p", errors="coerce")
+        minutes = (parsed.dt.hour * 60 + parsed.dt.minute).to_numpy(dtype=float)
+        return np.append(minutes, np.nan)[codes]
+
+    start_min = clock_minutes("1st Call")
+    end_min = clock_minutes("Shift End")
+
+    # 🧠 Handle overnight shifts
+    end_min = np.where(end_min < start_min, end_min + 24 * 60, end_min)
+    max_possible = ((end_min - start_min) * 60) / 3600
+
+    if "Time Connected" in df.columns:
+        raw_tc = df["Time Connected"]
+        time_connected = pd.to_numeric(raw_tc, errors="coerce").to_numpy(dtype=float)
+        bad_tc = (raw_tc.notna().to_numpy() & np.isnan(time_connected)) | np.isinf(time_connected)
+    else:
+        time_connected = np.zeros(len(df))
+        bad_tc = np.zeros(len(df), dtype=bool)
+
+    unparseable = np.isnan(max_possible) | bad_tc
+    missing = ~unparseable & np.isnan(time_connected)
+    diff = time_connected - max_possible
+
+    # 🚨 Flag any positive difference
+    flagged = ~unparseable & ~missing & (diff > 0)
+    mismatch_amount = np.where(flagged, diff, 0.0)
+
+    visible = np.full(len(df), "✅", dtype=object)
+    visible[flagged] = "⚠️ +" + decimal_to_hhmmss_nosign_column(diff[flagged]).to_numpy()
+    visible[missing] = "⚠️ Missing"
+    visible[unparseable] = "⚠️"
+
+    # Trace only rows that could not be checked
+    agents = df["Agent"].astype(str) if "Agent" in df.columns else pd.Series("Unknown", index=df.index)
+    debug = np.full(len(df), "", dtype=object)
+    debug[missing] = "Missing Time Connected"
+    debug[unparseable] = (agents[unparseable] + " | Error: unparseable shift times").to_numpy()
+
+    df["Time Mismatch"] = visible
+    df["_Debug"] = debug
+    df["_MismatchAmount"] = mismatch_amount
+
+    return df
+
+
+
+
+def classify_office(agent_name):
+    if isinstance(agent_name, str):
+        if agent_name.lower() in COMMERCIAL_AGENTS:
+            return "Commercial"
+        prefix, space, _ = agent_name.partition(" ")
+        if space:
+            return OFFICE_PREFIXES.get(prefix + " ", "Other")
+    return "Other"
+
+
+def classify_offices(agents):
+    """
+    Bulk version of classify_office for a whole Agent column.
+
+    Each distinct name is classified once: commercial overrides via isin,
+    then the name prefix (text before the first space) is looked up in
+    OFFICE_PREFIXES.
+
+    Parameters:
+        agents (pd.Series): Agent names
+
+    Returns:
+        pd.Series: Categorical Office column (OFFICE_CATEGORIES), same index
+    """
+    codes, names = pd.factorize(agents)
+    names = pd.Series(names, dtype=object)
+
+    # .str returns NaN for non-string names, which fall through to "Other"
+    prefix = names.str.extract(r"^([^ ]*) ", expand=False) + " "
+    office = prefix.map(OFFICE_PREFIXES).fillna("Other")
+    office = office.mask(names.str.lower().isin(COMMERCIAL_AGENTS), "Commercial")
+
+    office = np.append(office.to_numpy(dtype=object), "Other")[codes]
+    return pd.Series(
+        pd.Categorical(office, categories=OFFICE_CATEGORIES),
+        index=agents.index,
+        name="Office",
+    )
+
+
+
+#-------------------------------------------------------------------------------------------------------------------------------------------------------------
+### === CORE DATA PROCESSING ===
+
+
+# 🌊 Raw rows per chunk when a CSV is streamed instead of loaded whole
+STREAMING_CHUNK_ROWS = int(os.getenv("STREAMING_CHUNK_ROWS", "50000"))
+
+# 🗄️ Processed-file cache: (file fingerprint, report date, code version) → processed DataFrame
+# The code version is a hash of this module, so any change to the pipeline invalidates old entries.
+PROCESSING_CODE_VERSION = hashlib.sha256(pathlib.Path(__file__).read_bytes()).hexdigest()[:16]
+PROCESSING_CACHE_MAX_ENTRIES = int(os.getenv("PROCESSING_CACHE_MAX_ENTRIES", "64"))
+PROCESSING_CACHE_DIR = os.getenv("PROCESSING_CACHE_DIR")  # optional Parquet tier (unset = memory only)
+PROCESSING_CACHE_MAX_BYTES = int(os.getenv("PROCESSING_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+PROCESSING_CACHE_STATS = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+_PROCESSING_CACHE = OrderedDict()
+_PROCESSING_CACHE_LOCK = threading.Lock()
+
+
+def _processing_cache_key(file_name, data, report_date):
+    """
+    Builds the processing cache key for one uploaded file.
+
+    The file is fingerprinted from its parsed contents (columns, dtypes and a
+    row hash) plus its name, since the name decides the server label. Raw CSV
+    sources that are streamed are fingerprinted from their bytes instead.
+
+    Returns:
+        str: Hex digest identifying (file content, report date, code version)
+    """
+    digest = hashlib.sha256()
+    digest.update(file_name.encode())
+    if isinstance(data, pd.DataFrame):
+        digest.update(repr([str(c) for c in data.columns]).encode())
+        digest.update(repr([str(t) for t in data.dtypes]).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    elif isinstance(data, (bytes, bytearray)):
+        digest.update(b"raw")
+        digest.update(data)
+    elif isinstance(data, (str, os.PathLike)):
+        digest.update(b"raw")
+        with open(data, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    else:
+        digest.update(b"raw")
+        data.seek(0)
+        for block in iter(lambda: data.read(1 << 20), b""):
+            digest.update(block)
+        data.seek(0)
+    digest.update(pd.Timestamp(report_date).strftime("%Y-%m-%d").encode())
+    digest.update(PROCESSING_CODE_VERSION.encode())
+    return digest.hexdigest()
+
+
+def _read_processing_cache(key, cache_dir):
+    """
+    Returns the cached (server key, DataFrame) for a cache key, or None.
+
+    Looks in memory first, then in the Parquet tier (promoting disk hits
+    back into memory). Callers get a copy so they can mutate it freely.
+    """
+    with _PROCESSING_CACHE_LOCK:
+        if key in _PROCESSING_CACHE:
+            _PROCESSING_CACHE.move_to_end(key)
+            PROCESSING_CACHE_STATS["hits"] += 1
+            server_key, df = _PROCESSING_CACHE[key]
+            return server_key, df.copy()
+
+    if cache_dir:
+        path = os.path.join(cache_dir, f"{key}.parquet")
         try:
-            # 🕒 Extract time components (drop date)
-            start_str = str(row.get("1st Call")).split()[-1]
-            end_str = str(row.get("Shift End")).split()[-1]
+            table = pq.read_table(path)
+            os.utime(path)
+        except (OSError, pa.ArrowException):
+            table = None
+        if table is not None:
+            meta = json.loads(table.schema.metadata[b"agent_metrics"])
+            df = table.to_pandas()
+            df.columns = meta["columns"]  # restore names (incl. the duplicated "Server")
+            _store_processing_cache(key, meta["server_key"], df, cache_dir=None)
+            with _PROCESSING_CACHE_LOCK:
+                PROCESSING_CACHE_STATS["disk_hits"] += 1
+            return meta["server_key"], df.copy()
+
+    with _PROCESSING_CACHE_LOCK:
+        PROCESSING_CACHE_STATS["misses"] += 1
+    return None
+
+
+def _store_processing_cache(key, server_key, df, cache_dir):
+    """
+    Stores a processed DataFrame in memory (LRU, bounded by entry count) and,
+    when cache_dir is set, in the Parquet tier (LRU, bounded by size).
+    """
+    with _PROCESSING_CACHE_LOCK:
+        _PROCESSING_CACHE[key] = (server_key, df.copy())
+        _PROCESSING_CACHE.move_to_end(key)
+        while len(_PROCESSING_CACHE) > PROCESSING_CACHE_MAX_ENTRIES:
+            _PROCESSING_CACHE.popitem(last=False)
+            PROCESSING_CACHE_STATS["evictions"] += 1
+
+    if not cache_dir:
+        return
+
+    # Parquet needs unique column names, so store positionally and keep the real names in metadata
+    stored = df.copy()
+    stored.columns = [str(i) for i in range(df.shape[1])]
+    try:
+        table = pa.Table.from_pandas(stored, preserve_index=True)
+    except (pa.ArrowException, TypeError, ValueError):
+        return  # mixed-type column Arrow can't store → memory tier only
+    meta = json.dumps({"server_key": server_key, "columns": [str(c) for c in df.columns]})
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"agent_metrics": meta.encode()})
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{key}.parquet"))
+    except (OSError, pa.ArrowException):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
+
+    evicted = _evict_cache_dir(cache_dir, PROCESSING_CACHE_MAX_BYTES, suffix=".parquet")
+    with _PROCESSING_CACHE_LOCK:
+        PROCESSING_CACHE_STATS["evictions"] += evicted
+
+
+def get_processing_cache_stats():
+    """
+    Returns a copy of the processing cache counters (memory hits, disk hits, misses, evictions).
+    """
+    with _PROCESSING_CACHE_LOCK:
+        return dict(PROCESSING_CACHE_STATS)
 
-            start_time = datetime.strptime(start_str, "%I:%M%p")
-            end_time = datetime.strptime(end_str, "%I:%M%p")
 
-            # 🧠 Use fixed date to compute timedelta
-            dummy_date = datetime(2000, 1, 1)
-            start_dt = dummy_date.replace(hour=start_time.hour, minute=start_time.minute)
-            end_dt = dummy_date.replace(hour=end_time.hour, minute=end_time.minute)
+def _process_uploaded_file(file_name, df, report_date):
+    """
+    Runs the full cleaning/enrichment pipeline for one uploaded server (or Chase) file.
 
-            if end_dt < start_dt:
-                end_dt += timedelta(days=1)  # Handle overnight shifts
+    Files are independent of each other, so this is what load_and_process_data
+    fans out to a worker pool when parallel processing is enabled.
 
-            max_possible = (end_dt - start_dt).total_seconds() / 3600
-            time_connected = row.get("Time Connected", 0)
+    Parameters:
+        file_name (str): Original file name (used to read the server number)
+        df (pd.DataFrame): Raw CSV contents
+        report_date (datetime): The selected report date
 
-            if pd.isna(time_connected):
-                return "⚠️ Missing", "Missing Time Connected", 0
+    Returns:
+        Tuple[str, pd.DataFrame]: ("Server N" or "Chase", processed DataFrame)
+    """
+    # Drop last row if totals or empty (copied, so the caller's frame is left untouched)
+    df = df[:-1].copy() if len(df) > 0 else df.copy()
 
-            diff = time_connected - max_possible
+    key, df = _process_report_rows(file_name, df, report_date)
+    return key, _finalize_report_frame(df)
 
-            def format_diff_to_hms(hours):
-                total_seconds = int(hours * 3600)
-                h = total_seconds // 3600
-                m = (total_seconds % 3600) // 60
-                s = total_seconds % 60
-                return f"{h:02}:{m:02}:{s:02}"
 
-            # 🚨 Flag if difference > 10 min
-            if diff > 0:
-                visible = f"⚠️ +{format_diff_to_hms(diff)}"
-                mismatch_amount = diff
-            else:
-                visible = "✅"
-                mismatch_amount = 0
+def _process_report_rows(file_name, df, report_date):
+    """
+    Runs the row-wise stages of the pipeline (normalize, parse, mismatch, office,
+    TTG, column selection) on raw report rows, footer already removed.
+
+    Every stage only looks at its own row, so this can run on a whole file or on
+    consecutive chunks of one (see _process_report_csv_chunked).
+
+    Returns:
+        Tuple[str, pd.DataFrame]: ("Server N" or "Chase", processed rows, unsorted)
+    """
+    df["Report Date"] = report_date.strftime("%Y-%m-%d")
+    df = df.dropna(how="all")
+
+
+    # Normalize raw agent names: remove non-breaking and trailing spaces
+    if "Login ID" in df.columns:
+        df["Login ID"] = (
+            df["Login ID"]
+            .astype(str)
+            .str.replace("\u00A0", " ", regex=False)  # replace non-breaking space
+            .str.replace(r"\s+", " ", regex=True)     # collapse weird spacing
+            .str.strip()                              # remove leading/trailing
+        )
+
+
+    # 🆕 Detect Chase data (column 'Agente' is unique to Chase files)
+    if "Agente" in df.columns:
+        # 1) Load & rename chase columns
+        df = load_chase_data(df)
+        df["Report Date"] = report_date.strftime("%Y-%m-%d")
+        
+        # — Normalize Chase “1st Call” to local ReadyMode format —
+        #    • Parse “21/07/2025 9:42:34”
+        #    • Subtract 2 hours
+        #    • Reformat to e.g. “Jul 21 7:42AM”
+        df["1st Call"] = (
+            pd.to_datetime(df["1st Call"], dayfirst=True, errors="coerce")
+              .sub(pd.Timedelta(hours=2))
+              .dt.strftime("%b %d %I:%M%p")
+              .str.replace(r"^0", "", regex=True)  # drop leading zero in hour
+        )
+
+        # 2) Convert all time columns into decimal hours
+        for col in ["Time Connected", "Break", "Talk Time", "Wrap Up"]:
+            if col in df.columns:
+                df[col] = time_strings_to_decimal(df[col])
+
+        # 3) Compute Time To Goal (TTG) for Chase rows (no mismatch penalty)
+        df["Office"] = classify_offices(df["Agent"])
+        df = add_time_to_goal(df, report_date, include_mismatch=False)
+        df = add_punctuality_columns(df, report_date)
+
+        # 4) Label & finalize
+        df["Server"] = "Chase"
+        for col in DISPLAY_COLUMN_ORDER:
+            if col not in df.columns:
+                df[col] = ""
+        df = df[[c for c in DISPLAY_COLUMN_ORDER if c in df.columns]
+                + ["Office", "Report Date", "Server"] + PUNCTUALITY_COLUMNS]
+
+        return "Chase", df
 
-            debug = f"{row['Agent']} | TC: {time_connected:.2f} | Max: {max_possible:.2f} | Diff: {diff:.2f}"
-            return visible, debug, mismatch_amount
 
-        except Exception as e:
-            return "⚠️", f"{row.get('Agent', 'Unknown')} | Error: {e}", 0
 
-    # 🧪 Apply to all rows and unpack results into 3 columns
-    results = df.apply(check_mismatch, axis=1)
-    df["Time Mismatch"] = results.apply(lambda x: x[0])
-    df["_Debug"] = results.apply(lambda x: x[1])
-    df["_MismatchAmount"] = results.apply(lambda x: x[2])
+    # Rename columns using global mapping
+    df.rename(columns=COLUMN_RENAME_MAP, inplace=True)
+
+
+    # Convert time-related columns to decimal format
+    for col in ["Time Connected", "Break", "Talk Time", "Wrap Up"]:
+        if col in df.columns:
+            df[col] = time_strings_to_decimal(df[col])
+
+    # Flag time mismatches between shift and reported time
+    df = detect_inconsistencies(df)
 
+
+
+
+    # Assign Office (also reused by the goal lookup in the TTG step)
+    df["Office"] = classify_offices(df["Agent"])
+
+    # Time To Goal (TTG) calculation for all rows at once
+    df = add_time_to_goal(df, report_date)
+
+    # Clock-in punctuality, computed once for every consumer
+    df = add_punctuality_columns(df, report_date)
+
+
+    # ✅ Extract actual server number from the file name
+    server_number_str = server_number_from_filename(file_name) or "?"
+
+    df["Server"] = f"Server {server_number_str}"
+
+    # Ensure all display columns exist
+    for col in DISPLAY_COLUMN_ORDER:
+        if col not in df.columns:
+            df[col] = ""
+
+    # Final column list + metadata
+    columns_to_keep = [col for col in DISPLAY_COLUMN_ORDER if col in df.columns]
+    for meta_col in ["Office", "Report Date", "Server"] + PUNCTUALITY_COLUMNS:
+        if meta_col in df.columns:
+            columns_to_keep.append(meta_col)
+
+    df = df[columns_to_keep]
+
+    # Store under server name
+    return f"Server {server_number_str}", df
+
+
+def _finalize_report_frame(df):
+    """
+    Sorts processed rows by agent and numbers them from 1.
+    """
+    df = df.sort_values(by="Agent", ascending=True)
+    df.index = range(1, len(df) + 1)
     return df
 
 
+def _on_report_date(first_call, report_date):
+    """
+    Flags the rows whose 1st Call (e.g. "Jul 21 7:42AM") falls on report_date.
+    Clock-ins that can't be parsed are kept, like the whole-file path keeps them.
 
+    Returns:
+        np.ndarray: Boolean mask aligned to first_call
+    """
+    report_day = pd.Timestamp(report_date).normalize()
+    first_call = first_call.astype(object)
+    first_call = first_call.where(first_call.map(type) == str)
 
-def classify_office(agent_name):
-    commercial_agents = {
-        "sp tony", "sp allan", "sp chris", "sp mathew", "sp steve", "w retano", "sp jennifer1", "sp tom1"
-    }
+    # Parse each distinct clock-in once
+    codes, uniques = pd.factorize(first_call)
+    texts = pd.Index(uniques, dtype=object) + f" {report_day.year}"
+    days = pd.to_datetime(texts, format="%b %d %I:%M%p %Y", errors="coerce").normalize()
+    keep = np.asarray(days.isna() | (days == report_day))
+    return np.append(keep, True)[codes]
 
-    if isinstance(agent_name, str):
-        if agent_name.lower() in commercial_agents:
-            return "Commercial"
-        if agent_name.startswith("n "): return "Tepic"
-        if agent_name.startswith("a "): return "Army"
-        if agent_name.startswith("w "): return "West"
-        if agent_name.startswith("sp ") or agent_name.startswith("pr "): return "Sp & Prime"
-        if agent_name.startswith("e "): return "Egypt"
-        if agent_name.startswith("s "): return "Spanish"
-        if agent_name.startswith("g "): return "Tigers"
-        if agent_name.startswith("v "): return "CDMX"
-    return "Other"
 
+def _process_report_csv_chunked(file_name, source, report_date, chunk_size=None):
+    """
+    Streams a report CSV through the pipeline in bounded chunks.
 
+    Only chunk_size raw rows are in memory at once; each chunk is reduced to the
+    processed display columns, and to the rows whose 1st Call is on report_date,
+    before the next is read. The last row of every chunk is held back and
+    prepended to the next one, so when the file ends the held-back row is the
+    footer and is dropped exactly like df[:-1] does.
 
-#-------------------------------------------------------------------------------------------------------------------------------------------------------------
-### === CORE DATA PROCESSING ===
+    Multi-day exports therefore only keep the selected day: peak memory is one
+    raw chunk plus that day's processed rows. A file that is all one day still
+    keeps every row (the report shows one row per agent per server), so its
+    peak grows with the output.
 
+    Parameters:
+        file_name (str): Original file name (used to read the server number)
+        source (str | bytes | file-like): Path, raw bytes or file object with the CSV
+        report_date (datetime): The selected report date
+        chunk_size (int): Raw rows per chunk (defaults to STREAMING_CHUNK_ROWS)
 
-def load_and_process_data(uploaded_dfs, report_date):
+    Returns:
+        Tuple[str, pd.DataFrame]: ("Server N" or "Chase", processed DataFrame)
+    """
+    _, usecols = read_report_header(source, file_name)
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+
+    processed = []
+    key = None
+    held_back = None
+    reader = pd.read_csv(
+        source,
+        usecols=usecols,
+        dtype={col: str for col in usecols},
+        chunksize=chunk_size or STREAMING_CHUNK_ROWS,
+    )
+    with reader:
+        for chunk in reader:
+            if held_back is not None:
+                chunk = pd.concat([held_back, chunk], ignore_index=True)
+            held_back = chunk.iloc[-1:]
+            rows = chunk.iloc[:-1].copy()
+            if len(rows):
+                key, part = _process_report_rows(file_name, rows, report_date)
+                processed.append(part[_on_report_date(part["1st Call"], report_date)])
+
+    # Nothing but a footer (or an empty file) → still return the right columns
+    if not processed:
+        empty = held_back.iloc[:0].copy() if held_back is not None else pd.DataFrame(columns=usecols)
+        key, part = _process_report_rows(file_name, empty, report_date)
+        processed.append(part)
+
+    return key, _finalize_report_frame(pd.concat(processed))
+
+
+def _process_uploaded_item(file_name, data, report_date):
+    """
+    Processes one load_and_process_data input: an in-memory DataFrame, or a raw
+    CSV source (path / bytes / file object) that is streamed in chunks.
+    """
+    if isinstance(data, pd.DataFrame):
+        return _process_uploaded_file(file_name, data, report_date)
+    return _process_report_csv_chunked(file_name, data, report_date)
+
+
+def load_and_process_data(uploaded_dfs, report_date, workers=1, executor="thread",
+                          cache=True, cache_dir=PROCESSING_CACHE_DIR):
     """
     Processes all uploaded CSV files and returns cleaned, enriched data grouped by server.
 
@@ -805,181 +2093,423 @@ def load_and_process_data(uploaded_dfs, report_date):
         - Assigns Office based on Login ID
         - Ensures consistent column order
 
+    Files are independent until the final numeric coercion, so with workers > 1
+    they are processed concurrently. Results are merged back in upload order,
+    so the returned dict is identical to the sequential run.
+
+    Processed files are cached by (file contents, report date, code version):
+    files seen before are served from the cache and only new or changed files
+    are run through the pipeline.
+
     Parameters:
-        uploaded_dfs (List[Tuple[str, pd.DataFrame]]): List of (filename, DataFrame) tuples
+        uploaded_dfs (List[Tuple[str, pd.DataFrame | source]]): (filename, DataFrame) tuples;
+            a raw CSV source (path, bytes or file object) in place of the DataFrame
+            is streamed in chunks instead, keeping only
+            report_date rows (see _process_report_csv_chunked)
         report_date (datetime): The selected report date
+        workers (int | None): Number of files processed at once (1 = sequential, None = one per CPU)
+        executor (str): "thread" or "process" pool used when workers != 1
+        cache (bool): Use the processing cache
+        cache_dir (str | None): Optional directory for the on-disk Parquet cache tier
 
     Returns:
         Dict[str, pd.DataFrame]: Dictionary of DataFrames keyed by "Server 1", "Server 2", etc.
     """
     combined_data = {}
-    server_number = 1  # Start count at Server 1
 
-    for file_name, df in uploaded_dfs:
-        df["Report Date"] = report_date.strftime("%Y-%m-%d")
+    # 🗄️ Serve unchanged files from the processing cache
+    results = [None] * len(uploaded_dfs)
+    cache_keys = [None] * len(uploaded_dfs)
+    pending = []
+    for i, (file_name, df) in enumerate(uploaded_dfs):
+        if cache:
+            cache_keys[i] = _processing_cache_key(file_name, df, report_date)
+            results[i] = _read_processing_cache(cache_keys[i], cache_dir)
+        if results[i] is None:
+            pending.append(i)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(pending))
+
+    if workers > 1:
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor: {executor!r} (expected 'thread' or 'process')")
+        pool_cls = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+        with pool_cls(max_workers=workers) as pool:
+            # map() yields in submission order, which keeps keys and their order deterministic
+            processed = list(pool.map(
+                _process_uploaded_item,
+                [uploaded_dfs[i][0] for i in pending],
+                [uploaded_dfs[i][1] for i in pending],
+                [report_date] * len(pending),
+            ))
+    else:
+        processed = [_process_uploaded_item(*uploaded_dfs[i], report_date) for i in pending]
 
-        # Drop last row if totals or empty
-        df = df[:-1] if len(df) > 0 else df
-        df = df.dropna(how="all")
+    for i, (key, df) in zip(pending, processed):
+        if cache:
+            _store_processing_cache(cache_keys[i], key, df, cache_dir)
+        results[i] = (key, df)
 
+    for key, df in results:
+        combined_data[key] = df
 
-        # Normalize raw agent names: remove non-breaking and trailing spaces
-        if "Login ID" in df.columns:
-            df["Login ID"] = (
-                df["Login ID"]
-                .astype(str)
-                .str.replace("\u00A0", " ", regex=False)  # replace non-breaking space
-                .str.replace(r"\s+", " ", regex=True)     # collapse weird spacing
-                .str.strip()                              # remove leading/trailing
-            )
 
+    for df_name, df in combined_data.items():
+        for col in ["Sales", "Break", "Wrap Up", "Talk Time", "Time Connected"]:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(float)
 
-        # 🆕 Detect Chase data (column 'Agente' is unique to Chase files)
-        if "Agente" in df.columns:
-            # 1) Load & rename chase columns
-            df = load_chase_data(df)
-            df["Report Date"] = report_date.strftime("%Y-%m-%d")
-            
-            # — Normalize Chase “1st Call” to local ReadyMode format —
-            #    • Parse “21/07/2025 9:42:34”
-            #    • Subtract 2 hours
-            #    • Reformat to e.g. “Jul 21 7:42AM”
-            df["1st Call"] = (
-                pd.to_datetime(df["1st Call"], dayfirst=True, errors="coerce")
-                  .sub(pd.Timedelta(hours=2))
-                  .dt.strftime("%b %d %I:%M%p")
-                  .str.replace(r"^0", "", regex=True)  # drop leading zero in hour
-            )
 
-            # 2) Convert all time columns into decimal hours
-            for col in ["Time Connected", "Break", "Talk Time", "Wrap Up"]:
-                if col in df.columns:
-                    df[col] = df[col].apply(time_string_to_decimal)
-
-            # 3) Compute Time To Goal (TTG) for Chase rows            
-            def calculate_ttgs_chase(row):
-                agent = row.get("Agent")  # ensures agent is visible
-                goal_time, break_limit, wrap_limit, _, _ = get_daily_time_goals(report_date)
-                tc = row.get("Time Connected", 0)
-                br = row.get("Break", 0)
-                wr = row.get("Wrap Up", 0)
-                # same cross-compensation you use elsewhere
-                extra_break = max(0, br - break_limit)
-                extra_wrap  = max(0, wr - wrap_limit)
-                available_break = max(0, break_limit - br)
-                available_wrap  = max(0, wrap_limit - wr)
-                wrap_offset = min(extra_wrap, available_break)
-                break_offset= min(extra_break, available_wrap)
-                extra_wrap  -= wrap_offset
-                extra_break -= break_offset
-                total_penalty   = extra_break + extra_wrap
-                mismatch_penalty = 0
-                ttg = (tc - goal_time - total_penalty) - mismatch_penalty
-                return pd.Series([ttg, False])
-            df[["Time To Goal", "_TTG_Adjusted"]] = df.apply(calculate_ttgs_chase, axis=1)
-
-            # 4) Label & finalize
-            df["Server"] = "Chase"
-            df["Office"] = df["Agent"].apply(classify_office)
-            for col in DISPLAY_COLUMN_ORDER:
-                if col not in df.columns:
-                    df[col] = ""
-            df = df[[c for c in DISPLAY_COLUMN_ORDER if c in df.columns]
-                    + ["Office", "Report Date", "Server"]]
-            df = df.sort_values(by="Agent", ascending=True)
-            df.index = range(1, len(df) + 1)
-
-            combined_data["Chase"] = df
-            continue
+    return combined_data
 
 
 
-        # Rename columns using global mapping
-        df.rename(columns=COLUMN_RENAME_MAP, inplace=True)
 
 
-        # Convert time-related columns to decimal format
-        for col in ["Time Connected", "Break", "Talk Time", "Wrap Up"]:
-            if col in df.columns:
-                df[col] = df[col].apply(time_string_to_decimal)
 
-        # Flag time mismatches between shift and reported time
-        df = detect_inconsistencies(df)
 
-     
+#-------------------------------------------------------------------------------------------------------------------------------------------------------------
+### === ARCHIVE: PARQUET HISTORY / QUERIES ===
+
+# 📚 Processed days are archived here, one hive partition per report date
+ARCHIVE_DIR = os.getenv("METRICS_ARCHIVE_DIR", "metrics_archive")
+ARCHIVE_PARTITION = "report_date"
+
+# Archive schema: DISPLAY_COLUMN_ORDER + Office + _MinutesLate (Report Date is the partition key).
+# Chase reports Shift End as decimal hours, so it is kept numeric in _ShiftEndHours.
+ARCHIVE_SCHEMA = pa.schema([
+    ("Sales", pa.float64()),
+    ("Server", pa.string()),
+    ("1st Call", pa.string()),
+    ("Shift End", pa.string()),
+    ("_ShiftEndHours", pa.float64()),
+    ("Agent", pa.string()),
+    ("Time To Goal", pa.float64()),
+    ("Time Connected", pa.float64()),
+    ("Break", pa.float64()),
+    ("Talk Time", pa.float64()),
+    ("Wrap Up", pa.float64()),
+    ("Time Mismatch", pa.string()),
+    ("_MismatchAmount", pa.float64()),
+    ("_TTG_Adjusted", pa.bool_()),
+    ("Office", pa.dictionary(pa.int32(), pa.string())),
+    ("_MinutesLate", pa.float64()),
+])
+
+
+def _archive_text_column(values):
+    """
+    Converts a column to text for the archive, keeping missing values missing.
+    """
+    values = pd.Series(values, dtype=object)
+    text = values.astype(str).to_numpy(dtype=object)
+    text[values.isna().to_numpy()] = None
+    return pa.array(text, type=pa.string())
 
 
-        # Time To Goal (TTG) calculation per row
-        def calculate_ttgs(row):
-            agent = row.get("Agent")  # 🔹 inject agent into local scope for inspect.stack()
-            goal_time, break_limit, wrap_limit, _, _ = get_daily_time_goals(report_date)
-            tc = row.get("Time Connected", 0)
-            br = row.get("Break", 0)
-            wr = row.get("Wrap Up", 0)
+def _archive_frame(df):
+    """
+    Moves numeric Shift End values (Chase decimal hours) into _ShiftEndHours so
+    the text column only holds ReadyMode timestamps.
+    """
+    df = df.loc[:, ~df.columns.duplicated()]
+    if "Shift End" in df.columns and pd.api.types.is_numeric_dtype(df["Shift End"]):
+        df = df.assign(_ShiftEndHours=df["Shift End"], **{"Shift End": np.nan})
+    return df
 
-            extra_break = max(0, br - break_limit)
-            extra_wrap = max(0, wr - wrap_limit)
 
-            available_break = max(0, break_limit - br)
-            available_wrap = max(0, wrap_limit - wr)
+def archive_processed_data(combined_data, report_date, archive_dir=ARCHIVE_DIR, source="dropbox"):
+    """
+    Writes one processed report date to the Parquet archive.
+
+    Every server's rows are stored in a single zstd-compressed file under
+    <archive_dir>/report_date=YYYY-MM-DD/. The file is written to a temp name
+    and swapped in, so rewriting a date replaces it atomically and running the
+    same day twice leaves exactly one copy.
+
+    The file's metadata records a hash of the rows and where they came from.
+    Unchanged data is not rewritten (Streamlit reruns the whole script on every
+    interaction), and a manual upload never replaces a day archived from Dropbox.
+
+    Parameters:
+        combined_data (Dict[str, pd.DataFrame]): Output of load_and_process_data
+        report_date (date | datetime): The report date the data belongs to
+        archive_dir (str): Archive root directory
+        source (str): "dropbox" or "upload"
+
+    Returns:
+        str | None: Path of the written Parquet file, or None if the archive was already up to date
 
-            # Apply cross-compensation: only once each
-            wrap_offset = min(extra_wrap, available_break)
-            break_offset = min(extra_break, available_wrap)
+    Raises:
+        ValueError: If an upload would overwrite a day archived from Dropbox
+    """
+    date_str = pd.Timestamp(report_date).strftime("%Y-%m-%d")
+    frames = [_archive_frame(df) for df in combined_data.values()]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if "_MinutesLate" not in df.columns and {"Agent", "1st Call"} <= set(df.columns):
+        df["_MinutesLate"] = minutes_late_column(df, pd.Timestamp(report_date))
+
+    columns = {}
+    for field in ARCHIVE_SCHEMA:
+        values = df[field.name] if field.name in df.columns else pd.Series(np.nan, index=df.index)
+        if pa.types.is_boolean(field.type):
+            columns[field.name] = pa.array(values.fillna(False).astype(bool).to_numpy())
+        elif pa.types.is_floating(field.type):
+            columns[field.name] = pa.array(
+                pd.to_numeric(values, errors="coerce").astype(float).to_numpy(), from_pandas=True  # NaN → null
+            )
+        elif pa.types.is_dictionary(field.type):
+            columns[field.name] = _archive_text_column(values).dictionary_encode()
+        else:
+            columns[field.name] = _archive_text_column(values)
+    table = pa.table(columns, schema=ARCHIVE_SCHEMA)
+
+    # 🔑 Hash of the archived rows (the same day reprocessed from the same CSVs hashes the same)
+    content_hash = hashlib.sha256(
+        pd.util.hash_pandas_object(table.to_pandas(), index=False).to_numpy().tobytes()
+    ).hexdigest()
+    archived_at = report_today().strftime("%Y-%m-%d")
+
+    partition_dir = os.path.join(archive_dir, f"{ARCHIVE_PARTITION}={date_str}")
+    path = os.path.join(partition_dir, "data.parquet")
+    if os.path.exists(path):
+        existing = pq.read_schema(path).metadata or {}
+        existing_source = existing.get(b"source", b"dropbox").decode()
+        if source == "upload" and existing_source == "dropbox":
+            raise ValueError(f"{date_str} is already archived from Dropbox; the upload was not archived")
+        if (existing.get(b"content_hash", b"").decode() == content_hash
+                and existing_source == source
+                and (existing.get(b"archived_at", b"").decode() > date_str or archived_at <= date_str)):
+            return None  # same rows, and a rewrite would not mark the day complete
+
+    table = table.replace_schema_metadata({
+        b"archived_at": archived_at.encode(),
+        b"content_hash": content_hash.encode(),
+        b"source": source.encode(),
+    })
 
-            extra_wrap -= wrap_offset
-            extra_break -= break_offset
+    os.makedirs(partition_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=partition_dir, prefix=".", suffix=".tmp")  # hidden from scans
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
 
 
+def load_archived_data(start_date, end_date=None, columns=None, offices=None, archive_dir=ARCHIVE_DIR):
+    """
+    Reads a report date range from the Parquet archive.
 
-            total_penalty = extra_break + extra_wrap
-            mismatch_penalty = row.get("_MismatchAmount", 0)
+    Only the partitions in the range are opened (partition pruning), only the
+    requested columns are read (column pruning), and the optional office filter
+    is pushed down into the scan.
 
-            ttg = (tc - goal_time - total_penalty) - mismatch_penalty
-            adjusted = mismatch_penalty > 0
-            return pd.Series([ttg, adjusted])
+    Parameters:
+        start_date (date | datetime): First report date (inclusive)
+        end_date (date | datetime): Last report date (inclusive, defaults to start_date)
+        columns (List[str]): Columns to read (None = all archive columns)
+        offices (List[str]): Only return rows from these offices
+        archive_dir (str): Archive root directory
 
-        df[["Time To Goal", "_TTG_Adjusted"]] = df.apply(calculate_ttgs, axis=1)
+    Returns:
+        pd.DataFrame: Archived rows plus a "Report Date" column (empty if nothing is archived)
+    """
+    columns = list(columns) if columns is not None else ARCHIVE_SCHEMA.names
+    columns = [c for c in columns if c != "Report Date"]
 
+    table = _scan_archive(start_date, end_date, columns, offices, archive_dir)
+    if table is None:
+        return pd.DataFrame(columns=columns + ["Report Date"])
+    return _archive_table_to_frame(table).rename(columns={ARCHIVE_PARTITION: "Report Date"})
 
-        df["Office"] = df["Agent"].apply(classify_office)
 
+def _scan_archive(start_date, end_date, columns, offices, archive_dir):
+    """
+    Scans the archive for a date range and returns an Arrow table with the
+    requested columns plus the report_date partition column (None if there is
+    no archive yet).
+    """
+    if not os.path.isdir(archive_dir):
+        return None
 
-        # ✅ Extract actual server number from the file name
-        match = re.search(r"automation(\d+)", file_name.lower())
-        server_number_str = match.group(1) if match else "?"
+    start = pd.Timestamp(start_date).strftime("%Y-%m-%d")
+    end = pd.Timestamp(end_date if end_date is not None else start_date).strftime("%Y-%m-%d")
 
-        df["Server"] = f"Server {server_number_str}"
+    dataset = ds.dataset(
+        archive_dir,
+        format="parquet",
+        schema=ARCHIVE_SCHEMA.append(pa.field(ARCHIVE_PARTITION, pa.string())),
+        partitioning=ds.partitioning(pa.schema([(ARCHIVE_PARTITION, pa.string())]), flavor="hive"),
+        exclude_invalid_files=False,
+        ignore_prefixes=[".", "_"],
+    )
+    condition = (ds.field(ARCHIVE_PARTITION) >= start) & (ds.field(ARCHIVE_PARTITION) <= end)
+    if offices is not None:
+        condition = condition & ds.field("Office").isin(list(offices))
 
-        # Ensure all display columns exist
-        for col in DISPLAY_COLUMN_ORDER:
-            if col not in df.columns:
-                df[col] = ""
+    return dataset.to_table(columns=list(columns) + [ARCHIVE_PARTITION], filter=condition)
 
-        # Final column list + metadata
-        columns_to_keep = [col for col in DISPLAY_COLUMN_ORDER if col in df.columns]
-        for meta_col in ["Office", "Report Date", "Server"]:
-            if meta_col in df.columns:
-                columns_to_keep.append(meta_col)
 
-        df = df[columns_to_keep]
+def query_archive_metrics(start_date, end_date=None, by="office", period=None, offices=None,
+                          archive_dir=ARCHIVE_DIR):
+    """
+    Aggregates archived metrics per office or per agent over a date range.
+
+    The archive holds one row per agent per server, so rows are first
+    collapsed (on Arrow kernels over the pruned scan) to one shift per agent
+    per day, the same way insert_total_rows builds totals: durations, sales
+    and mismatch are summed, the clock-in is the earliest one, and Time To
+    Goal is recomputed on the sums against that day's goals. The shifts are
+    then aggregated: hours connected, sales, TTG attainment (share of shifts
+    with Time To Goal >= 0) and lateness rate (share of shifts clocked in more
+    than 5 minutes after shift start; unknown clock-ins count as late, like
+    the PDF export).
 
-        # Sort and reindex
-        df = df.sort_values(by="Agent", ascending=True)
-        df.index = range(1, len(df) + 1)
+    Parameters:
+        start_date (date | datetime): First report date (inclusive)
+        end_date (date | datetime): Last report date (inclusive, defaults to start_date)
+        by (str): "office" or "agent"
+        period (str | None): None for the whole range, "day" or "week" (weeks start Monday)
+        offices (List[str]): Only include these offices
+        archive_dir (str): Archive root directory
 
-        # Store under server name
-        
-        combined_data[f"Server {server_number_str}"] = df
-        server_number += 1
+    Returns:
+        pd.DataFrame: One row per group with the aggregated metrics
+    """
+    if by not in ("office", "agent"):
+        raise ValueError(f"Unknown grouping: {by!r} (expected 'office' or 'agent')")
+    if period not in (None, "day", "week"):
+        raise ValueError(f"Unknown period: {period!r} (expected None, 'day' or 'week')")
+
+    keys = ["Office"] if by == "office" else ["Office", "Agent"]
+    if period is not None:
+        keys = ["Period"] + keys
+    summed_columns = ["Time Connected", "Break", "Wrap Up", "_MismatchAmount", "Sales"]
+    metric_columns = ["Office", "Agent", "_MinutesLate"] + summed_columns
+
+    table = _scan_archive(start_date, end_date, metric_columns, offices, archive_dir)
+    if table is None or table.num_rows == 0:
+        return pd.DataFrame(columns=keys + ["Agents", "Days", "Shifts", "Hours Connected", "Sales",
+                                            "TTG Attainment %", "Late %"])
+
+    # One shift per agent per day (an agent can appear on several servers)
+    table = table.set_column(table.schema.get_field_index("Office"), "Office",
+                             pc.cast(table["Office"], pa.string()))
+    for col in summed_columns:
+        table = table.set_column(table.schema.get_field_index(col), col, pc.fill_null(table[col], 0.0))
+    shifts = table.group_by([ARCHIVE_PARTITION, "Office", "Agent"]).aggregate(
+        [(col, "sum") for col in summed_columns] + [("_MinutesLate", "min")]
+    ).to_pandas()
+    shifts.columns = [col.removesuffix("_sum").removesuffix("_min") for col in shifts.columns]
+
+    # Time To Goal on the summed shift, against each day's goals. Goals only
+    # depend on the weekday and the agent, so each distinct pair is resolved once.
+    report_days = pd.to_datetime(shifts[ARCHIVE_PARTITION])
+    shifts["_weekday"] = report_days.dt.weekday.to_numpy()
+    pairs = shifts[["_weekday", "Office", "Agent"]].drop_duplicates()
+    pair_goals = []
+    for weekday, weekday_pairs in pairs.groupby("_weekday"):
+        any_day = report_days[shifts["_weekday"] == weekday].iloc[0]
+        goals = get_daily_time_goal_columns(weekday_pairs, any_day)
+        pair_goals.append(pd.concat([weekday_pairs, goals], axis=1))
+    goals = shifts[["_weekday", "Office", "Agent"]].merge(
+        pd.concat(pair_goals), on=["_weekday", "Office", "Agent"], how="left"
+    )
+    ttg, _ = calculate_ttg_columns(
+        shifts["Time Connected"], shifts["Break"], shifts["Wrap Up"], shifts["_MismatchAmount"],
+        goals["_GoalTime"], goals["_BreakLimit"], goals["_WrapLimit"],
+    )
+    ttg = pd.Series(ttg, index=shifts.index)
+    shifts["_attained"] = (ttg >= 0).astype(float)
+    shifts["_late"] = shifts["_MinutesLate"].gt(5) | shifts["_MinutesLate"].isna()
+
+    if period == "week":
+        days = pd.to_datetime(shifts[ARCHIVE_PARTITION])
+        shifts["Period"] = (days - pd.to_timedelta(days.dt.weekday, unit="D")).dt.strftime("%Y-%m-%d")
+    elif period == "day":
+        shifts["Period"] = shifts[ARCHIVE_PARTITION]
+
+    result = shifts.groupby(keys, sort=False).agg(
+        **{
+            "Agents": ("Agent", "nunique"),
+            "Days": (ARCHIVE_PARTITION, "nunique"),
+            "Shifts": ("Agent", "size"),
+            "Hours Connected": ("Time Connected", "sum"),
+            "Sales": ("Sales", "sum"),
+            "TTG Attainment %": ("_attained", "mean"),
+            "Late %": ("_late", "mean"),
+        }
+    ).reset_index()
+
+    result["TTG Attainment %"] = (result["TTG Attainment %"] * 100).round(1)
+    result["Late %"] = (result["Late %"] * 100).round(1)
+    result["Hours Connected"] = result["Hours Connected"].round(2)
+    if by == "agent":
+        result = result.drop(columns="Agents")
+
+    columns = keys + [c for c in result.columns if c not in keys]
+    return result[columns].sort_values(keys, ignore_index=True)
+
+
+def _archive_table_to_frame(table):
+    """
+    Converts an archive table to pandas with the same conventions as the
+    processed frames (NaN for missing text, Office as the full category set).
+    """
+    df = table.to_pandas()
+    for col in df.columns:
+        if df[col].dtype == object:
+            values = df[col].to_numpy()
+            values[pd.isna(values)] = np.nan  # Arrow nulls arrive as None
+            df[col] = values
+    if "Office" in df.columns:
+        df["Office"] = df["Office"].astype("category").cat.set_categories(OFFICE_CATEGORIES)
+    return df
 
 
-    for df_name, df in combined_data.items():
-        for col in ["Sales", "Break", "Wrap Up", "Talk Time", "Time Connected"]:
-            if col in df.columns:
-                df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(float)
+def load_archived_report(report_date, archive_dir=ARCHIVE_DIR, complete_only=True):
+    """
+    Rebuilds the load_and_process_data output for one archived report date.
 
+    Parameters:
+        report_date (date | datetime): The report date to load
+        archive_dir (str): Archive root directory
+        complete_only (bool): Ignore archives written on the report date itself
+            (the day's exports may not have all arrived yet)
 
+    Returns:
+        Dict[str, pd.DataFrame] | None: DataFrames keyed by server, or None if not archived
+    """
+    date_str = pd.Timestamp(report_date).strftime("%Y-%m-%d")
+    path = os.path.join(archive_dir, f"{ARCHIVE_PARTITION}={date_str}", "data.parquet")
+    if not os.path.exists(path):
+        return None
+    if complete_only:
+        archived_at = (pq.read_schema(path).metadata or {}).get(b"archived_at", b"").decode()
+        if archived_at <= date_str:
+            return None
+
+    # Single partition → read its file directly instead of discovering the dataset
+    df = _archive_table_to_frame(pq.read_table(path))
+    df["Report Date"] = date_str
+    df = add_punctuality_columns(df, pd.Timestamp(report_date))
+
+    # Same column layout as load_and_process_data (which lists "Server" twice)
+    layout = DISPLAY_COLUMN_ORDER + ["Office", "Report Date", "Server"] + PUNCTUALITY_COLUMNS
+    combined_data = {}
+    for server, server_df in df.groupby("Server", sort=False):
+        hours = server_df["_ShiftEndHours"]
+        if hours.notna().any() and server_df["Shift End"].isna().all():
+            server_df = server_df.assign(**{"Shift End": hours})  # Chase: decimal hours
+        server_df = server_df[layout]
+        server_df.index = range(1, len(server_df) + 1)
+        combined_data[server] = server_df
     return combined_data
 
 
@@ -993,6 +2523,70 @@ def load_and_process_data(uploaded_dfs, report_date):
 
 
 
+# 📥 Download payloads served from memory: (path, mtime, size) → file bytes, LRU bounded by size
+DOWNLOAD_CACHE_MAX_BYTES = int(os.getenv("DOWNLOAD_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+DOWNLOAD_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+_DOWNLOAD_CACHE = OrderedDict()
+_DOWNLOAD_CACHE_LOCK = threading.Lock()
+
+
+def read_download_payload(path, max_bytes=DOWNLOAD_CACHE_MAX_BYTES):
+    """
+    Returns a file's bytes for st.download_button without re-reading it every rerun.
+
+    Payloads are cached process-wide (shared by all viewers) under the file's
+    path, mtime and size, so a re-exported file is picked up right away and
+    older versions of it are dropped. Least recently used payloads are evicted
+    once the cache holds more than max_bytes; a file larger than that is read
+    but not cached.
+
+    Parameters:
+        path (str): File to serve (PDF, ZIP, ...)
+        max_bytes (int): Total size bound of the cache
+
+    Returns:
+        bytes: File contents
+    """
+    stat = os.stat(path)
+    path = os.path.abspath(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+
+    with _DOWNLOAD_CACHE_LOCK:
+        payload = _DOWNLOAD_CACHE.get(key)
+        if payload is not None:
+            _DOWNLOAD_CACHE.move_to_end(key)
+            DOWNLOAD_CACHE_STATS["hits"] += 1
+            return payload
+        DOWNLOAD_CACHE_STATS["misses"] += 1
+
+    with open(path, "rb") as f:
+        payload = f.read()
+
+    if len(payload) > max_bytes:
+        return payload
+
+    with _DOWNLOAD_CACHE_LOCK:
+        # Drop stale versions of the same file, then the least recently used payloads
+        for stale_key in [k for k in _DOWNLOAD_CACHE if k[0] == path]:
+            del _DOWNLOAD_CACHE[stale_key]
+        _DOWNLOAD_CACHE[key] = payload
+        total = sum(len(cached) for cached in _DOWNLOAD_CACHE.values())
+        while total > max_bytes:
+            _, evicted = _DOWNLOAD_CACHE.popitem(last=False)
+            total -= len(evicted)
+            DOWNLOAD_CACHE_STATS["evictions"] += 1
+
+    return payload
+
+
+def get_download_cache_stats():
+    """
+    Returns a copy of the download payload cache counters (hits, misses, evictions).
+    """
+    with _DOWNLOAD_CACHE_LOCK:
+        return dict(DOWNLOAD_CACHE_STATS)
+
+
 def send_email(to_email, subject, body, attachment_path=None, from_email=None):
     """
     Sends an email with optional PDF attachment using Brevo SMTP.
@@ -1057,35 +2651,82 @@ def send_email(to_email, subject, body, attachment_path=None, from_email=None):
 
 
 
-def export_html_pdf(grouped_data, output_path, chart_folder):
-    from collections import Counter
+# 🚦 Clock-in punctuality colors shared by the PDF backends
+PUNCTUALITY_COLORS = {"On time": "green", "Just made it": "#FFA500", "Late": "red"}
 
-    html_blocks = []
 
+def _agent_punctuality(row):
+    """
+    Reads a row's clock-in punctuality from its ingestion columns.
+
+    Returns:
+        Tuple[str | None, str]: (_PunctualityStatus, label such as "On time (3 min early)"),
+            or (None, "Unknown") when the clock-in couldn't be parsed
+    """
+    status = row.get("_PunctualityStatus")
+    if not isinstance(status, str):
+        return None, "Unknown"
+
+    delay = format_punctuality_delay(row["_MinutesLate"])
+    if status == "On time":
+        return status, f"On time ({delay} early)"
+    return status, f"{status} ({delay} late)"
+
+
+def _office_punctuality(stats_df):
+    """
+    Returns (agents, on time %, just made it %, late %) for an office; unknown counts as late.
+    """
+    total = len(stats_df)
+    status_counts = stats_df["_PunctualityStatus"].fillna("Late").value_counts()
+
+    on_pct = round((status_counts.get("On time", 0) / total) * 100)
+    just_pct = round((status_counts.get("Just made it", 0) / total) * 100)
+    late_pct = round((status_counts.get("Late", 0) / total) * 100)
+    return total, on_pct, just_pct, late_pct
+
+
+def _agent_label(row):
+    """
+    Returns the PDF heading for an agent block ("Ana (Total)", "Ana (Chase)", "Ana on Server 2").
+    """
+    agent = row["Agent"]
+    server_label = row.get("Server", "")
+
+    if row.get("is_total") is True:
+        return f"{agent} (Total)"
+    elif server_label == "Chase":
+        return f"{agent} (Chase)"
+    return f"{agent} on {server_label}"
+
+
+def _pdf_sample_row(grouped_data):
+    """
+    Picks the row whose report date drives the PDF goal summary.
+    """
     # 🔍 Try to find a non-total agent row; fallback to any row if needed
-    sample_row = None
     for df in grouped_data.values():
         for _, row in df.iterrows():
             if not row.get("is_total", False):
-                sample_row = row
-                break
-        if sample_row is not None:
-            break
+                return row
 
     # 🔁 If no non-total found, fallback to just any row
-    if sample_row is None:
-        for df in grouped_data.values():
-            if not df.empty:
-                sample_row = df.iloc[0]
-                break
+    for df in grouped_data.values():
+        if not df.empty:
+            return df.iloc[0]
 
     # 🚨 Final guard
-    if sample_row is None:
-        raise ValueError("❌ No rows found at all to generate goal summary for PDF.")
+    raise ValueError("❌ No rows found at all to generate goal summary for PDF.")
+
+
+def export_html_pdf(grouped_data, output_path, chart_folder, chart_format="png"):
+    html_blocks = []
 
+    sample_row = _pdf_sample_row(grouped_data)
     report_date = pd.to_datetime(sample_row["Report Date"])
-    agent_name = sample_row["Agent"]
-    goal_time, break_limit, wrap_limit, talk_goal, _ = get_daily_time_goals(report_date)
+    goal_time, break_limit, wrap_limit, talk_goal, _ = get_daily_time_goals(
+        report_date, agent=sample_row["Agent"], office=sample_row.get("Office")
+    )
     goal_time   = decimal_to_hhmmss_nosign(goal_time)
     break_limit = decimal_to_hhmmss_nosign(break_limit)
     wrap_limit  = decimal_to_hhmmss_nosign(wrap_limit)
@@ -1130,29 +2771,7 @@ def export_html_pdf(grouped_data, output_path, chart_folder):
 
         stats_df = office_df.attrs.get("unique_summary_rows", office_df)
 
-        total = len(stats_df)
-        status_counts = Counter()
-        for _, row in stats_df.iterrows():
-
-
-            try:
-                call_dt = pd.to_datetime(row["1st Call"] + f" {report_date.year}")
-                _, _, _, _, shift_start = get_daily_time_goals(report_date)
-                shift_time = datetime.strptime(shift_start, "%H:%M").time()
-                shift_dt = call_dt.replace(hour=shift_time.hour, minute=shift_time.minute, second=0)
-                delta = (call_dt - shift_dt).total_seconds() / 60
-                if delta <= 0:
-                    status_counts["on_time"] += 1
-                elif delta <= 5:
-                    status_counts["just_made_it"] += 1
-                else:
-                    status_counts["late"] += 1
-            except:
-                status_counts["late"] += 1
-
-        on_pct = round((status_counts["on_time"] / total) * 100)
-        just_pct = round((status_counts["just_made_it"] / total) * 100)
-        late_pct = round((status_counts["late"] / total) * 100)
+        total, on_pct, just_pct, late_pct = _office_punctuality(stats_df)
 
 
 
@@ -1175,52 +2794,36 @@ def export_html_pdf(grouped_data, output_path, chart_folder):
         print(office_df[["Agent", "Sales", "Time Connected", "Break", "Wrap Up"]])
 
 
-        for _, row in office_df.iterrows():
-            ttg_val = row.get("Time To Goal", None)
+        # Format every Time To Goal in the office at once
+        ttg_values = pd.to_numeric(
+            office_df.get("Time To Goal", pd.Series(np.nan, index=office_df.index)),
+            errors="coerce"
+        )
+        ttg_text = decimal_to_hhmmss_column(ttg_values).to_numpy()
+
+        for position, (_, row) in enumerate(office_df.iterrows()):
+            ttg_val = ttg_values.iloc[position]
             if pd.notna(ttg_val):
-                ttg_str = decimal_to_hhmmss(ttg_val)
+                ttg_str = ttg_text[position]
                 ttg_color = "green" if ttg_val >= 0 else "red"
                 ttg_str = f"<span style='color:{ttg_color}'>{ttg_str}</span>"
             else:
                 ttg_str = "--:--:--"
 
 
-            try:
-                call_dt = pd.to_datetime(row["1st Call"] + f" {report_date.year}")
-                _, _, _, _, shift_start = get_daily_time_goals(report_date)
-                shift_time = datetime.strptime(shift_start, "%H:%M").time()
-                shift_dt = call_dt.replace(hour=shift_time.hour, minute=shift_time.minute, second=0)
-                delta = (call_dt - shift_dt).total_seconds() / 60
-                mins = abs(int(delta))
-                delay = f"{mins} min" if mins < 60 else f"{mins//60}h {mins%60}m"
-                if delta <= 0:
-                    status = f"<span style='color:green; font-weight:bold;'>On time ({delay} early)</span>"
-                elif delta <= 5:
-                    status = f"<span style='color:#FFA500; font-weight:bold;'>Just made it ({delay} late)</span>"
-                else:
-                    status = f"<span style='color:red; font-weight:bold;'>Late ({delay} late)</span>"
-            except:
-                status = "<span style='color:gray;'>Unknown</span>"
+            punctuality, punctuality_text = _agent_punctuality(row)
+            if punctuality:
+                status = f"<span style='color:{PUNCTUALITY_COLORS[punctuality]}; font-weight:bold;'>{punctuality_text}</span>"
+            else:
+                status = f"<span style='color:gray;'>{punctuality_text}</span>"
 
             sales = row.get("Sales", 0)    
             # 🔵 Label logic
-            agent = row["Agent"]
-            is_total = row.get("is_total") is True
-            server_label = row.get("Server", "")
-            server_number = ""
-
-            if is_total:
-                agent_label = f"{agent} (Total)"
-            elif server_label == "Chase":
-                agent_label = f"{agent} (Chase)"
-            elif server_label.startswith("Server") and server_label[-1].isdigit():
-                agent_label = f"{agent} on {server_label}"
-            else:
-                agent_label = f"{agent} on {server_label}"
+            agent_label = _agent_label(row)
 
 
             # Chart image path
-            chart_filename = f"{agent.replace(' ', '_')}_{row.name}.png"
+            chart_filename = export_chart_filename(row, chart_format)
             chart_path = os.path.abspath(os.path.join(chart_folder, chart_filename))
 
             # Final HTML block
@@ -1286,29 +2889,318 @@ def export_html_pdf(grouped_data, output_path, chart_folder):
 
 
 
+def export_reportlab_pdf(grouped_data, output_path, chart_folder, chart_format="png"):
+    """
+    Writes the same report as export_html_pdf straight to PDF with reportlab's canvas.
 
+    Same structure (title + goal paragraph, office punctuality summary, one
+    block per agent with its chart), laid out with fixed metrics instead of
+    building and parsing an HTML document. The canvas keeps every finished
+    page until save(), so memory still grows with the number of agents.
 
+    Parameters:
+        grouped_data (Dict[str, pd.DataFrame]): Office -> export DataFrame
+        output_path (str): Destination PDF path
+        chart_folder (str): Folder holding the rendered charts
+        chart_format (str): Chart file extension ("png" or "svg")
+    """
+    sample_row = _pdf_sample_row(grouped_data)
+    report_date = pd.to_datetime(sample_row["Report Date"])
+    goal_time, break_limit, wrap_limit, talk_goal, _ = get_daily_time_goals(
+        report_date, agent=sample_row["Agent"], office=sample_row.get("Office")
+    )
 
+    # Page geometry: the HTML template's px sizes at 0.75 pt/px (1 cm page margin,
+    # 20px/25px body padding, charts at their 500px native width)
+    page_width, page_height = A4
+    margin = 1 * cm
+    text_x = margin + 18.75
+    block_x = text_x + 17.5
+    text_width = page_width - 2 * text_x
+    chart_width, chart_height = 375, 187.5
+    body_size, body_leading = 11.25, 16.5
+    top = page_height - margin - 15
+
+    pdf = rl_canvas.Canvas(output_path, pagesize=A4, pageCompression=1)
+    y = top
+
+    def new_page():
+        nonlocal y
+        pdf.showPage()
+        y = top
+
+    def draw_line(segments, x=text_x, size=body_size, leading=body_leading):
+        # segments: [(text, bold, color)] drawn left to right on one line
+        nonlocal y
+        y -= leading
+        for text, bold, color in segments:
+            font = "Helvetica-Bold" if bold else "Helvetica"
+            pdf.setFont(font, size)
+            pdf.setFillColor(toColor(color))
+            pdf.drawString(x, y, text)
+            x += pdf.stringWidth(text, font, size)
+
+    def draw_rule(color, width=0.75, dash=None, space=12, x0=margin, x1=page_width - margin):
+        nonlocal y
+        y -= space
+        pdf.setStrokeColor(toColor(color))
+        pdf.setLineWidth(width)
+        if dash:
+            pdf.setDash(*dash)
+        else:
+            pdf.setDash()
+        pdf.line(x0, y, x1, y)
+        y -= space
+
+    def draw_chart(path):
+        nonlocal y
+        if os.path.exists(path):
+            if chart_format == "svg":
+                drawing = svg2rlg(path)
+                factor = chart_width / drawing.width
+                drawing.width, drawing.height = chart_width, drawing.height * factor
+                drawing.scale(factor, factor)
+                renderPDF.draw(drawing, pdf, block_x, y - chart_height)
+            else:
+                pdf.drawImage(path, block_x, y - chart_height, chart_width, chart_height)
+        y -= chart_height
+
+    # === Title + goal paragraph ===
+    draw_line([("Daily Agent Report", True, HexColor("#007acc"))], size=22.5, leading=28)
+    y -= 24
+    intro = (
+        "Today’s goal is to ensure all agents complete their Logged In Time, avoid exceeding Break or "
+        "Wrap-Up time, and reach the minimum Talk Time. More time on the phones means more opportunities to sell."
+    )
+    for text in simpleSplit(intro, "Helvetica", body_size, text_width):
+        draw_line([(text, False, "black")])
+    y -= 6
+    for label, value in [
+        ("• Time Connected:", goal_time), ("• Break Limit:", break_limit),
+        ("• Wrap-Up Limit:", wrap_limit), ("• Talk Time Goal:", talk_goal),
+    ]:
+        draw_line([(label, True, "black"), (f" {decimal_to_hhmmss_nosign(value)}", False, "black")])
+    draw_rule("black", width=1.5, space=24)
 
+    for office_index, (office, office_df) in enumerate(grouped_data.items()):
+        if office_index > 0:
+            new_page()
 
+        # === Office punctuality summary ===
+        stats_df = office_df.attrs.get("unique_summary_rows", office_df)
+        total, on_pct, just_pct, late_pct = _office_punctuality(stats_df)
+        draw_line([(f"{office} — {total} agents connected", True, "black")], size=12, leading=18)
+        draw_line([(f"On Time: {on_pct}%", False, PUNCTUALITY_COLORS["On time"])], size=12, leading=18)
+        draw_line([(f"Just Made It: {just_pct}%", False, PUNCTUALITY_COLORS["Just made it"])], size=12, leading=18)
+        draw_line([(f"Late: {late_pct}%", False, PUNCTUALITY_COLORS["Late"])], size=12, leading=18)
+        draw_rule(HexColor("#aaaaaa"), dash=(3, 2), space=24)
+
+        ttg_values = pd.to_numeric(
+            office_df.get("Time To Goal", pd.Series(np.nan, index=office_df.index)),
+            errors="coerce"
+        )
+        ttg_text = decimal_to_hhmmss_column(ttg_values).to_numpy()
 
+        # === One block per agent, kept on a single page ===
+        block_height = 18 + 3 * body_leading + 30 + chart_height + 60
+        for position, (_, row) in enumerate(office_df.iterrows()):
+            if y - block_height < margin:
+                new_page()
 
+            ttg_val = ttg_values.iloc[position]
+            if pd.notna(ttg_val):
+                ttg_segment = (f" {ttg_text[position]}", False, "green" if ttg_val >= 0 else "red")
+            else:
+                ttg_segment = (" --:--:--", False, "black")
 
+            punctuality, punctuality_text = _agent_punctuality(row)
 
+            draw_line([(_agent_label(row), True, "black")], x=block_x, size=12, leading=18)
+            draw_line([(punctuality_text, punctuality is not None, PUNCTUALITY_COLORS.get(punctuality, "gray"))], x=block_x)
+            draw_line([("Sales:", True, "black"), (f" {row.get('Sales', 0)}", False, "black")], x=block_x)
+            draw_line([("Time To Goal:", True, "black"), ttg_segment], x=block_x)
+            y -= 30
+            draw_chart(os.path.join(chart_folder, export_chart_filename(row, chart_format)))
+            draw_rule(HexColor("#dddddd"), space=30, x0=block_x, x1=page_width - block_x)
 
+    pdf.save()
 
 
+# 🖨️ PDF layout engine: "html" (xhtml2pdf) or "reportlab" (direct drawing)
+PDF_ENGINES = {"html": export_html_pdf, "reportlab": export_reportlab_pdf}
+PDF_ENGINE = os.getenv("PDF_ENGINE", "html").lower()
 
 
+def _export_office_pdf(office, office_df, output_path, chart_folder, chart_format, engine="html"):
+    """
+    Process-pool worker: renders one office PDF and returns (office, path).
+    """
+    PDF_ENGINES[engine]({office: office_df}, output_path, chart_folder=chart_folder, chart_format=chart_format)
+    return office, output_path
 
 
+def export_office_pdfs(grouped_data, output_dir, date_str, chart_folder, chart_format="png", workers=None,
+                       engine=None):
+    """
+    Renders one PDF per office, concurrently in a process pool.
 
+    PDF layout is single-threaded and CPU-bound, so offices are laid out in
+    separate processes (largest first), and a day with many offices takes
+    about as long as its largest office. Each worker gets its office
+    DataFrame (attrs included) and reads charts from the shared chart folder.
 
+    Parameters:
+        grouped_data (Dict[str, pd.DataFrame]): Office -> export DataFrame, in report order
+        output_dir (str): Folder the office PDFs are written to
+        date_str (str): Date label used in the file names
+        chart_folder (str): Folder holding the rendered charts
+        chart_format (str): Chart file extension ("png" or "svg")
+        workers (int | None): Worker processes (None = one per CPU, 1 = sequential)
+        engine (str): "html" (xhtml2pdf) or "reportlab" (defaults to PDF_ENGINE)
 
-def build_export_figure(row, color_override=None):
+    Returns:
+        Dict[str, str]: Office -> PDF path, in report order
+    """
+    engine = engine or PDF_ENGINE
+    if engine not in PDF_ENGINES:
+        raise ValueError(f"Unknown PDF engine: {engine!r} (expected one of {sorted(PDF_ENGINES)})")
+
+    jobs = [
+        (office, office_df, os.path.join(output_dir, f"{office}_Report_{date_str}.pdf"))
+        for office, office_df in grouped_data.items()
+        if not office_df.empty
+    ]
+    if not jobs:
+        return {}
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+
+    if workers > 1:
+        # Biggest offices first so the last one to finish is never a large one
+        jobs_by_size = sorted(jobs, key=lambda job: len(job[1]), reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_export_office_pdf, office, office_df, path, chart_folder, chart_format, engine)
+                for office, office_df, path in jobs_by_size
+            ]
+            rendered = dict(future.result() for future in futures)
+    else:
+        rendered = dict(
+            _export_office_pdf(office, office_df, path, chart_folder, chart_format, engine)
+            for office, office_df, path in jobs
+        )
+
+    return {office: rendered[office] for office, _, _ in jobs}
+
+
+def export_cover_pdf(report_date, office_sections, output_path):
+    """
+    Writes the cover page of the all-office report.
+
+    Parameters:
+        report_date (datetime): Report date shown under the title
+        office_sections (List[Tuple[str, int, int]]): (office, agents, first page) per office
+        output_path (str): Destination PDF path
+    """
+    rows = "".join(
+        f"""
+            <tr>
+                <td style="padding: 6px 4px; border-bottom: 1px solid #ddd;">{office}</td>
+                <td style="padding: 6px 4px; border-bottom: 1px solid #ddd; text-align: right;">{agents}</td>
+                <td style="padding: 6px 4px; border-bottom: 1px solid #ddd; text-align: right;">{page}</td>
+            </tr>"""
+        for office, agents, page in office_sections
+    )
+
+    cover_html = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <style>
+        body {{
+            font-family: Helvetica, Arial, sans-serif;
+            font-size: 15px;
+            color: #111;
+            margin: 0;
+            padding: 20px 25px;
+        }}
+    </style>
+</head>
+<body>
+    <h1 style="color: #007acc; font-size: 30px; margin-bottom: 12px;">Daily Agent Report</h1>
+    <p style="font-size: 18px; margin-bottom: 16px;">{pd.to_datetime(report_date).strftime("%B %d, %Y")} — All Offices</p>
+    <hr style="border: none; border-top: 2px solid #000; margin: 16px 0;" />
+    <table style="width: 100%; font-size: 15px;">
+        <tr>
+            <th style="text-align: left; padding: 6px 4px;">Office</th>
+            <th style="text-align: right; padding: 6px 4px;">Agents</th>
+            <th style="text-align: right; padding: 6px 4px;">Page</th>
+        </tr>{rows}
+    </table>
+</body>
+</html>"""
+
+    with open(output_path, "wb") as f:
+        pisa.CreatePDF(src=cover_html, dest=f)
+
+
+def export_full_report_pdf(grouped_data, office_pdf_paths, output_path):
+    """
+    Assembles the all-office report from already-rendered office PDFs.
+
+    Each office is laid out once (by export_html_pdf); the full report is a
+    generated cover page followed by the office PDFs' pages, with one
+    bookmark per office, instead of a second xhtml2pdf pass over every agent.
+
+    Parameters:
+        grouped_data (Dict[str, pd.DataFrame]): Office -> export DataFrame, in report order
+        office_pdf_paths (Dict[str, str]): Office -> rendered office PDF
+        output_path (str): Destination PDF path
+    """
+    offices = [office for office in grouped_data if office in office_pdf_paths]
+    if not offices:
+        raise ValueError("❌ No office PDFs to assemble into the full report.")
+
+    sample_df = grouped_data[offices[0]]
+    report_date = pd.to_datetime(sample_df["Report Date"].iloc[0])
+
+    # Page numbers for the cover (the cover itself is page 1)
+    office_sections = []
+    next_page = 2
+    for office in offices:
+        stats_df = grouped_data[office].attrs.get("unique_summary_rows", grouped_data[office])
+        office_sections.append((office, len(stats_df), next_page))
+        next_page += len(PdfReader(office_pdf_paths[office]).pages)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        cover_path = os.path.join(tmpdir, "cover.pdf")
+        export_cover_pdf(report_date, office_sections, cover_path)
+
+        writer = PdfWriter()
+        writer.append(cover_path)
+        for office in offices:
+            writer.append(office_pdf_paths[office], outline_item=str(office))
+
+        with open(output_path, "wb") as f:
+            writer.write(f)
+        writer.close()
+
+
+def _export_chart_bars(row, color_override=None):
+    """
+    Computes the four export chart bars for a row, shared by the Plotly and SVG renderers.
+
+    Returns:
+        List[Dict]: One dict per metric (bottom to top) with metric, bar_value,
+            color, text and text_position ("inside" if >=50%, otherwise "outside")
+    """
     # Extract time goals
     report_date = pd.to_datetime(row["Report Date"])
-    goal_time, break_limit, wrap_limit, talk_time_goal, shift_start = get_daily_time_goals(report_date)
+    goal_time, break_limit, wrap_limit, talk_time_goal, shift_start = get_daily_time_goals(
+        report_date, agent=row.get("Agent"), office=row.get("Office")
+    )
 
     goals = {
         "Talk Time": talk_time_goal,
@@ -1323,33 +3215,44 @@ def build_export_figure(row, color_override=None):
         "Time Connected": max(0, row.get("Time Connected", 0) - row.get("_MismatchAmount", 0))
     }
 
-    def format_time(val):
-        return decimal_to_hhmmss_nosign(val) if pd.notna(val) else "--:--:--"
+    # Format all values and goals in one pass
+    value_text = decimal_to_hhmmss_nosign_column(list(metrics.values()), missing="--:--:--").tolist()
+    goal_text = decimal_to_hhmmss_nosign_column(list(goals.values()), missing="--:--:--").tolist()
 
-    fig = go.Figure()
-
-    for metric, value in metrics.items():
+    bars = []
+    for i, (metric, value) in enumerate(metrics.items()):
         try:
             percent = round((value / goals[metric]) * 100) if pd.notna(value) and pd.notna(goals[metric]) and goals[metric] != 0 else 0
         except Exception:
             percent = 0
 
-        bar_value = min(percent, 150)
-        bar_color = color_override if color_override else get_bar_color(metric, percent)
-        text_display = f"{format_time(value)} / {format_time(goals[metric])}"
+        bars.append({
+            "metric": metric,
+            "bar_value": min(percent, 150),
+            "color": color_override if color_override else get_bar_color(metric, percent),
+            "text": f"{value_text[i]} / {goal_text[i]}",
+            # Text logic: inside if >=50%, otherwise outside
+            "text_position": "inside" if percent >= 50 else "outside",
+        })
+
+    return bars
+
+
+def build_export_figure(row, color_override=None):
+    bars = _export_chart_bars(row, color_override=color_override)
 
-        # Text logic: inside if >=50%, otherwise outside
-        text_position = "inside" if percent >= 50 else "outside"
+    fig = go.Figure()
 
+    for bar in bars:
         fig.add_trace(go.Bar(
-            x=[bar_value],
-            y=[metric],
+            x=[bar["bar_value"]],
+            y=[bar["metric"]],
             orientation='h',
-            text=[text_display],
-            textposition=text_position,
+            text=[bar["text"]],
+            textposition=bar["text_position"],
             textfont=dict(color="black", size=28),
             marker=dict(
-                color=bar_color,
+                color=bar["color"],
                 line=dict(color='rgba(0,0,0,0.25)', width=1),
             ),
             hoverinfo='skip'
@@ -1361,7 +3264,7 @@ def build_export_figure(row, color_override=None):
         x0=100,
         x1=100,
         y0=-0.5,
-        y1=len(metrics) - 0.5,
+        y1=len(bars) - 0.5,
         line=dict(color="black", width=2)
     )
 
@@ -1394,6 +3297,293 @@ def build_export_figure(row, color_override=None):
     return fig
 
 
+def build_export_svg(row, color_override=None, scale=0.5):
+    """
+    Draws the export chart for a row directly as SVG, without Plotly or Kaleido.
+
+    Same layout as build_export_figure (1000x500 canvas, four horizontal bars,
+    0-150% axis, goal line at 100%, labels inside from 50%), written as plain
+    markup so it costs well under a millisecond and needs no browser.
+
+    Parameters:
+        row (pd.Series): Agent (or total) row
+        color_override (str): Bar color override (e.g. for total rows)
+        scale (float): Output size factor (0.5 matches the Kaleido PNG size)
+
+    Returns:
+        str: SVG document
+    """
+    width, height = 1000, 500
+    left, right, top, bottom = 242, 960, 40, 430  # plot area after Plotly's automargin
+    slot = (bottom - top) / 4
+    x_of = lambda percent: left + (right - left) * percent / 150
+
+    font = 'font-family="Helvetica, Arial, sans-serif" fill="black"'
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width * scale:g}" height="{height * scale:g}" '
+        f'viewBox="0 0 {width} {height}">',
+        f'<rect width="{width}" height="{height}" fill="white"/>',
+    ]
+
+    # Grid + x axis ticks
+    for tick in range(0, 150, 20):
+        x = x_of(tick)
+        if tick:
+            parts.append(f'<line x1="{x:.1f}" x2="{x:.1f}" y1="{top}" y2="{bottom}" stroke="#EEEEEE" stroke-width="1"/>')
+        parts.append(f'<text x="{x:.1f}" y="{bottom + 32}" font-size="20" text-anchor="middle" {font}>{tick}</text>')
+    parts.append(f'<line x1="{left}" x2="{left}" y1="{top}" y2="{bottom}" stroke="#444444" stroke-width="1"/>')
+    parts.append(
+        f'<text x="{(left + right) / 2:.1f}" y="{bottom + 66}" font-size="22" text-anchor="middle" {font}>Progress (%)</text>'
+    )
+
+    # Bars, bottom to top (first metric at the bottom, like the Plotly category axis)
+    for i, bar in enumerate(_export_chart_bars(row, color_override=color_override)):
+        center = bottom - slot * (i + 0.5)
+        bar_end = x_of(bar["bar_value"])
+        baseline = center + 10  # ~0.35em below the middle for 28px text
+
+        parts.append(f'<text x="{left - 2}" y="{baseline:.1f}" font-size="28" text-anchor="end" {font}>{bar["metric"]}</text>')
+        parts.append(
+            f'<rect x="{left}" y="{center - slot * 0.4:.1f}" width="{bar_end - left:.1f}" height="{slot * 0.8:.1f}" '
+            f'fill="{bar["color"]}" stroke="black" stroke-opacity="0.25" stroke-width="1"/>'
+        )
+        if bar["text_position"] == "inside":
+            parts.append(f'<text x="{bar_end - 3:.1f}" y="{baseline:.1f}" font-size="28" text-anchor="end" {font}>{bar["text"]}</text>')
+        else:
+            parts.append(f'<text x="{bar_end + 3:.1f}" y="{baseline:.1f}" font-size="28" text-anchor="start" {font}>{bar["text"]}</text>')
+
+    # Goal line at 100%
+    parts.append(f'<line x1="{x_of(100):.1f}" x2="{x_of(100):.1f}" y1="{top}" y2="{bottom}" stroke="black" stroke-width="2"/>')
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+# 🖼️ Rendered export charts, keyed by the inputs build_export_figure reads
+CHART_CACHE_DIR = os.getenv(
+    "CHART_CACHE_DIR", os.path.join(tempfile.gettempdir(), "agent_metrics_chart_cache")
+)
+CHART_CACHE_MAX_BYTES = int(os.getenv("CHART_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CHART_CACHE_STATS = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def export_chart_cache_key(row, color_override=None, scale=0.5, fmt="png"):
+    """
+    Hashes everything build_export_figure + write_image depend on for one row:
+    the four metrics, the mismatch, the resolved goals, the color override and
+    the output scale/format. Rows with the same numbers get the same key, so
+    an unchanged agent is never rendered twice.
+    """
+    goals = get_daily_time_goals(
+        pd.to_datetime(row["Report Date"]), agent=row.get("Agent"), office=row.get("Office")
+    )
+    inputs = [
+        row.get("Talk Time", 0), row.get("Break", 0), row.get("Wrap Up", 0),
+        row.get("Time Connected", 0), row.get("_MismatchAmount", 0),
+    ]
+    payload = repr((
+        [float(v) if isinstance(v, (int, float, np.number)) else str(v) for v in inputs],
+        list(goals[:4]), color_override, scale, fmt,
+        PROCESSING_CODE_VERSION,  # chart code lives in this module
+    ))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _link_or_copy(src, dst):
+    """
+    Hard-links src to dst when possible (same filesystem), otherwise copies it.
+    """
+    if os.path.exists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _chart_cache_lookup(cache_dir, key):
+    """
+    Returns the cached PNG path for a key (touching it for LRU), or None.
+    """
+    cached_path = os.path.join(cache_dir, f"{key}.png")
+    if not os.path.exists(cached_path):
+        return None
+    os.utime(cached_path)
+    return cached_path
+
+
+def _chart_cache_store(cache_dir, key, png_bytes):
+    """
+    Stores rendered PNG bytes under a key (atomic write) and returns the cached path.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    cached_path = os.path.join(cache_dir, f"{key}.png")
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(png_bytes)
+        os.replace(tmp_path, cached_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return cached_path
+
+
+# 🎨 Export chart renderer: "kaleido" (Plotly PNG) or "svg" (native, no browser)
+CHART_RENDERER = os.getenv("CHART_RENDERER", "kaleido").lower()
+CHART_FORMATS = {"kaleido": "png", "svg": "svg"}
+
+
+def export_chart_filename(row, fmt="png"):
+    """
+    Returns the chart file name export_html_pdf expects for a row.
+    """
+    return f"{row['Agent'].replace(' ', '_')}_{row.name}.{fmt}"
+
+
+# 🔥 Warm Kaleido renderers kept alive across exports (one Chromium process each)
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", str(min(4, os.cpu_count() or 1))))
+_RENDER_SCOPES = queue.Queue()
+_RENDER_SCOPE_COUNT = 0
+_RENDER_SCOPE_LOCK = threading.Lock()
+
+
+def start_chart_renderer(workers=CHART_RENDER_WORKERS):
+    """
+    Starts (or grows) the pool of warm Kaleido renderers.
+
+    Each renderer is its own Kaleido/Chromium process, started once and warmed
+    with a tiny figure so no export pays the cold browser start. Calling it
+    again is cheap: running renderers are reused.
+
+    Parameters:
+        workers (int): Number of renderer processes to keep running
+
+    Returns:
+        int: Number of renderers available (0 when Kaleido v0 scopes are unavailable)
+    """
+    global _RENDER_SCOPE_COUNT
+    if PlotlyScope is None:
+        return 0
+
+    with _RENDER_SCOPE_LOCK:
+        default_scope = pio.kaleido.scope
+        while _RENDER_SCOPE_COUNT < max(1, workers):
+            scope = PlotlyScope(
+                plotlyjs=default_scope.plotlyjs,
+                mathjax=default_scope.mathjax,
+                topojson=default_scope.topojson,
+            )
+            scope.transform(go.Figure().to_plotly_json(), format="png", width=10, height=10)  # warm-up
+            _RENDER_SCOPES.put(scope)
+            _RENDER_SCOPE_COUNT += 1
+        return _RENDER_SCOPE_COUNT
+
+
+def _render_png(fig, scale):
+    """
+    Renders one figure to PNG bytes on whichever warm renderer is free.
+    """
+    if PlotlyScope is None:
+        return pio.to_image(fig, format="png", scale=scale)
+
+    scope = _RENDER_SCOPES.get()
+    try:
+        return scope.transform(fig.to_dict(), format="png", scale=scale)
+    finally:
+        _RENDER_SCOPES.put(scope)
+
+
+def render_export_charts(jobs, scale=0.5, progress_callback=None, cache_dir=CHART_CACHE_DIR,
+                         workers=CHART_RENDER_WORKERS, renderer=None):
+    """
+    Writes the export chart images for a batch of rows.
+
+    With the "kaleido" renderer, cache hits are linked straight into place and
+    the misses are built with build_export_figure and rendered concurrently on
+    the warm renderer pool. The "svg" renderer draws each chart with
+    build_export_svg instead (no browser, no cache needed). Results are written
+    (and progress reported) from the calling thread, so the callback can safely
+    update Streamlit elements.
+
+    Parameters:
+        jobs (List[Tuple[pd.Series, str, str | None]]): (row, destination path, color override);
+            paths should come from export_chart_filename with the renderer's format
+        scale (float): Output scale factor
+        progress_callback (Callable[[int, int], None]): Called with (done, total) after each chart
+        cache_dir (str | None): Chart cache directory (None disables the cache)
+        workers (int): Renderer processes used for the misses
+        renderer (str): "kaleido" or "svg" (defaults to CHART_RENDERER)
+
+    Returns:
+        Dict[str, int]: {"reused": cache hits, "rendered": charts rendered}
+    """
+    renderer = renderer or CHART_RENDERER
+    if renderer not in CHART_FORMATS:
+        raise ValueError(f"Unknown chart renderer: {renderer!r} (expected one of {sorted(CHART_FORMATS)})")
+
+    total = len(jobs)
+    done = 0
+
+    if renderer == "svg":
+        for row, path, color_override in jobs:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(build_export_svg(row, color_override=color_override, scale=scale))
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+        return {"reused": 0, "rendered": total}
+
+    misses = []
+
+    for row, path, color_override in jobs:
+        key = export_chart_cache_key(row, color_override=color_override, scale=scale) if cache_dir else None
+        cached_path = _chart_cache_lookup(cache_dir, key) if key else None
+        if cached_path:
+            CHART_CACHE_STATS["hits"] += 1
+            _link_or_copy(cached_path, path)
+            done += 1
+            if progress_callback:
+                progress_callback(done, total)
+        else:
+            if key:
+                CHART_CACHE_STATS["misses"] += 1
+            misses.append((row, path, color_override, key))
+
+    if misses:
+        pool_size = max(1, min(workers, len(misses)))
+        start_chart_renderer(pool_size)
+
+        def render(job):
+            row, _, color_override, _ = job
+            return _render_png(build_export_figure(row, color_override=color_override), scale)
+
+        with ThreadPoolExecutor(max_workers=pool_size) as pool:
+            futures = {pool.submit(render, job): job for job in misses}
+            for future in as_completed(futures):
+                _, path, _, key = futures[future]
+                png_bytes = future.result()
+                if key:
+                    _link_or_copy(_chart_cache_store(cache_dir, key, png_bytes), path)
+                else:
+                    with open(path, "wb") as f:
+                        f.write(png_bytes)
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total)
+
+        if cache_dir:
+            CHART_CACHE_STATS["evictions"] += _evict_cache_dir(cache_dir, CHART_CACHE_MAX_BYTES, suffix=".png")
+
+    return {"reused": total - len(misses), "rendered": len(misses)}
+
+
+def get_chart_cache_stats():
+    """
+    Returns a copy of the export chart cache hit/miss/eviction counters.
+    """
+    return dict(CHART_CACHE_STATS)
+
+
 
 
 
@@ -1408,7 +3598,9 @@ def build_progress_figure(row, unique_key_suffix=None, color_override=None):
 
     # Extract time goals for the day
     report_date = pd.to_datetime(row["Report Date"])
-    goal_time, break_limit, wrap_limit, talk_time_goal, shift_start = get_daily_time_goals(report_date)
+    goal_time, break_limit, wrap_limit, talk_time_goal, shift_start = get_daily_time_goals(
+        report_date, agent=row.get("Agent"), office=row.get("Office")
+    )
 
     # Map goals and actuals
     goals = {
@@ -1424,13 +3616,14 @@ def build_progress_figure(row, unique_key_suffix=None, color_override=None):
         "Time Connected": max(0, row.get("Time Connected", 0) - row.get("_MismatchAmount", 0))
     }
 
-    def format_time(val):
-        return decimal_to_hhmmss_nosign(val) if pd.notna(val) else "--:--:--"
+    # Format all values and goals in one pass
+    value_text = decimal_to_hhmmss_nosign_column(list(metrics.values()), missing="--:--:--").tolist()
+    goal_text = decimal_to_hhmmss_nosign_column(list(goals.values()), missing="--:--:--").tolist()
 
     fig = go.Figure()
     annotations = []
 
-    for metric, value in metrics.items():
+    for i, (metric, value) in enumerate(metrics.items()):
         try:
             percent = round((value / goals[metric]) * 100) if pd.notna(value) and pd.notna(goals[metric]) and goals[metric] != 0 else 0
         except Exception:
@@ -1441,7 +3634,7 @@ def build_progress_figure(row, unique_key_suffix=None, color_override=None):
 
 
         text_display = (
-            f"{format_time(value)} / {format_time(goals[metric])}"
+            f"{value_text[i]} / {goal_text[i]}"
             if pd.notna(value) and pd.notna(goals[metric])
             else "No data"
         )
@@ -27,15 +27,15 @@ else:
 import os
 import json
 import base64
-import shutil
 import tempfile
-from datetime import datetime
+from datetime import datetime, timedelta
 from io import BytesIO, StringIO
 from dotenv import load_dotenv
 load_dotenv()
 
 import tempfile
 import zipfile
+import threading
 
 
 
@@ -86,21 +86,39 @@ from supabase import create_client, Client
 # === LOCAL MODULES ===
 from data_processor import (
     load_and_process_data,
-    get_daily_time_goals,
     get_bar_color,
     get_latest_dropbox_csv,
+    report_today,
+    read_report_csv,
+    read_report_header,
+    archive_processed_data,
+    load_archived_report,
+    query_archive_metrics,
+    OFFICE_CATEGORIES,
+    get_chart_cache_stats,
+    get_dropbox_cache_stats,
+    get_download_cache_stats,
+    get_processing_cache_stats,
     sort_dataframe,
     format_time_columns,
     build_progress_figure,
     decimal_to_hhmmss_nosign,
-    export_html_pdf,
     send_email,
     decimal_to_hhmmss,
-    build_export_figure,
+    render_export_charts,
+    export_chart_filename,
+    format_punctuality_delay,
+    read_download_payload,
+    export_full_report_pdf,
+    export_office_pdfs,
+    CHART_RENDERER,
+    CHART_FORMATS,
+    start_chart_renderer,
     insert_total_rows,
     connect_to_gsheet,
     create_unique_worksheet,
-    export_df_to_sheet
+    export_df_to_sheet,
+    prepare_sheet_export
 )
 
 
@@ -170,6 +188,16 @@ DROPBOX_APP_KEY = os.getenv("DROPBOX_APP_KEY")
 DROPBOX_APP_SECRET = os.getenv("DROPBOX_APP_SECRET")
 DROPBOX_FOLDER = os.getenv("DROPBOX_FOLDER", "/ReadyModeReports")
 
+# --- Data Processing ---
+# Opt-in: process server files concurrently ("thread" or "process" pool)
+PROCESSING_WORKERS = int(os.getenv("PROCESSING_WORKERS", "1"))
+PROCESSING_EXECUTOR = os.getenv("PROCESSING_EXECUTOR", "thread")
+# Office PDFs are rendered in parallel worker processes (1 = sequential)
+PDF_EXPORT_WORKERS = int(os.getenv("PDF_EXPORT_WORKERS", str(os.cpu_count() or 1)))
+# Files larger than this are streamed through the pipeline in chunks instead of loaded whole
+# (Dropbox downloads go straight to disk; only the report date's rows are kept)
+STREAMING_THRESHOLD_BYTES = int(float(os.getenv("STREAMING_THRESHOLD_MB", "50")) * 1024 * 1024)
+
 
 # --- Supabase Access ---
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -253,7 +281,7 @@ with log_expander:
 
 
 # Report Date: Used to calculate correct daily goals
-default_date = datetime.today()
+default_date = report_today()  # office timezone, same day the Dropbox selection uses
 report_date = st.sidebar.date_input("📅 Report Date", default_date)
 
 
@@ -261,18 +289,41 @@ report_date = st.sidebar.date_input("📅 Report Date", default_date)
 st.sidebar.markdown("---")
 
 
-# === STEP 1: Try loading latest CSVs from Dropbox ===
-try:
-    files = get_latest_dropbox_csv(DROPBOX_FOLDER)
-    with log_expander:
-        if files:
-            st.info(f"📄 Found files: {[name for name, _ in files]}")
-        else:
-            st.warning("⚠️ No CSV files found in Dropbox folder.")
-except Exception as e:
+# === STEP 0: Past days come straight from the local Parquet archive ===
+archived_data = None
+if report_date < report_today():  # same "today" as the archive's completeness check
+    try:
+        archived_data = load_archived_report(report_date)
+    except Exception as e:
+        with log_expander:
+            st.warning(f"⚠️ Archive read failed, falling back to Dropbox: {e}")
+
+if archived_data:
     files = []
+    st.session_state.raw_data = archived_data
+    st.session_state["pdf_paths"] = {}
+    st.session_state["pdf_ready_next_cycle"] = True
     with log_expander:
-        st.error(f"❌ Dropbox error: {e}")
+        st.success(f"📚 Loaded {report_date:%Y-%m-%d} from the archive: {list(archived_data)}")
+
+
+# === STEP 1: Try loading latest CSVs from Dropbox ===
+if not archived_data:
+    try:
+        files = get_latest_dropbox_csv(
+            DROPBOX_FOLDER, report_date=report_date, stream_threshold_bytes=STREAMING_THRESHOLD_BYTES
+        )
+        with log_expander:
+            if files:
+                st.info(f"📄 Found files: {[name for name, _ in files]}")
+                cache_stats = get_dropbox_cache_stats()
+                st.info(f"🗄️ Dropbox cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+            else:
+                st.warning(f"⚠️ No CSV files found in Dropbox folder for {report_date:%Y-%m-%d}.")
+    except Exception as e:
+        files = []
+        with log_expander:
+            st.error(f"❌ Dropbox error: {e}")
 
 
 # === STEP 2: Parse CSVs into DataFrames + Process ===
@@ -283,19 +334,46 @@ if files:
             st.info("📥 Reading CSV files into DataFrames...")
 
         for file_name, file_bytes in files:
-            df = pd.read_csv(file_bytes)
+            try:
+                if isinstance(file_bytes, str):  # large file left on disk by get_latest_dropbox_csv
+                    read_report_header(file_bytes, file_name)  # reject unknown headers up front
+                    df = file_bytes  # streamed in chunks by load_and_process_data
+                else:
+                    df = read_report_csv(file_bytes, file_name)
+            except ValueError as e:
+                with log_expander:
+                    st.warning(f"⚠️ Skipped {file_name}: {e}")
+                continue
             file_data_pairs.append((file_name, df))
             
 
         with log_expander:
             st.info("🔄 Processing data...")
 
-        processed_data = load_and_process_data(file_data_pairs, report_date=report_date)
+        processed_data = load_and_process_data(
+            file_data_pairs,
+            report_date=report_date,
+            workers=PROCESSING_WORKERS,
+            executor=PROCESSING_EXECUTOR,
+        )
+        with log_expander:
+            cache_stats = get_processing_cache_stats()
+            st.info(
+                f"🗄️ Processing cache: {cache_stats['hits'] + cache_stats['disk_hits']} hits / "
+                f"{cache_stats['misses']} misses"
+            )
 
         st.session_state.raw_data = processed_data
         st.session_state["pdf_paths"] = {}
         st.session_state["pdf_ready_next_cycle"] = True
         st.session_state.dropbox_file_names = [name for name, _ in files]
+
+        # 📚 Keep a copy of the processed day in the archive (only rewritten when the rows change)
+        try:
+            archive_processed_data(processed_data, report_date, source="dropbox")
+        except Exception as e:
+            with log_expander:
+                st.warning(f"⚠️ Could not archive {report_date:%Y-%m-%d}: {e}")
         st.session_state["pdf_paths"] = {}  # Clear old PDFs
         
 
@@ -306,7 +384,7 @@ if files:
     except Exception as e:
         with log_expander:
             st.error(f"❌ Failed to process files: {e}")
-else:
+elif not archived_data:
     with log_expander:
         st.warning("⚠️ No data loaded from Dropbox.")
 
@@ -375,15 +453,28 @@ with st.sidebar:
 
     if update and st.session_state.uploaded_files:
         try:
-            file_data_pairs = [
-                (f.name, pd.read_csv(f)) for f in st.session_state.uploaded_files
-            ]
+            file_data_pairs = []
+            for f in st.session_state.uploaded_files:
+                try:
+                    if f.size > STREAMING_THRESHOLD_BYTES:
+                        read_report_header(f)  # reject unknown headers up front
+                        file_data_pairs.append((f.name, f))  # streamed in chunks
+                    else:
+                        file_data_pairs.append((f.name, read_report_csv(f)))
+                except ValueError as e:
+                    st.warning(f"⚠️ Skipped {f.name}: {e}")
 
             # Process & store results
             st.session_state.raw_data = load_and_process_data(
-                file_data_pairs, report_date=report_date
-            
+                file_data_pairs,
+                report_date=report_date,
+                workers=PROCESSING_WORKERS,
+                executor=PROCESSING_EXECUTOR,
             )
+            try:
+                archive_processed_data(st.session_state.raw_data, report_date, source="upload")
+            except Exception as e:
+                st.warning(f"⚠️ Could not archive {report_date:%Y-%m-%d}: {e}")
             st.session_state["pdf_paths"] = {}  # Clear old PDFs
 
 
@@ -473,48 +564,19 @@ def render_agent_block(row, unique_key_suffix=None):
     else:
         fig, goals = build_progress_figure(row, unique_key_suffix)
 
-    report_date = pd.to_datetime(row["Report Date"])
-    goal_time, break_limit, wrap_limit, talk_time_goal, shift_start = get_daily_time_goals(report_date)
-
-    # === Clock-in punctuality analysis ===
-    first_call_str = str(row.get("1st Call", ""))
-    try:
-        #print(f"📞 1st Call (raw): {first_call_str}")
-        call_dt = pd.to_datetime(first_call_str + f" {report_date.year}")
-        #print(f"📅 Full datetime string: {call_dt}")
-
-        #print(f"⏰ Shift start (raw): {shift_start}")
-        shift_time_obj = datetime.strptime(shift_start, "%H:%M").time()
-        shift_dt = call_dt.replace(hour=shift_time_obj.hour, minute=shift_time_obj.minute, second=0)
-
-        delta_minutes = (call_dt - shift_dt).total_seconds() / 60
-        minutes_abs = abs(int(delta_minutes))
+    # === Clock-in punctuality (computed once at ingestion) ===
+    status_label = row.get("_PunctualityStatus")
+    if isinstance(status_label, str):
+        delta_minutes = row["_MinutesLate"]
         direction = "early" if delta_minutes < 0 else "late"
-
-        hours = minutes_abs // 60
-        minutes = minutes_abs % 60
-        if hours > 0:
-            readable_delay = f"{hours}h {minutes}m"
-        else:
-            readable_delay = f"{minutes} min"
-
-        if delta_minutes <= 0:
-            status_label = "On time"
-            status_color = "green"
-        elif 0 < delta_minutes <= 5:
-            status_label = "Just made it"
-            status_color = "#FFD700"
-        else:
-            status_label = "Late"
-            status_color = "red"
+        readable_delay = format_punctuality_delay(delta_minutes)
+        status_color = {"On time": "green", "Just made it": "#FFD700"}.get(status_label, "red")
 
         inline_status = (
             f"<span style='color:{status_color}'><strong>{status_label}</strong> "
             f"({readable_delay} {direction})</span>"
         )
-
-    except Exception as e:
-        #print(f"⚠️ Clock-in parsing failed: {e}")
+    else:
         inline_status = "<span style='color:gray'><strong>Clock-in unknown</strong></span>"
 
     # === Helper to format decimal hours into hh:mm:ss for display ===
@@ -600,10 +662,11 @@ st.markdown(f"🕒 **Report Metrics: {selected_date_str}**")
 
 
 # === Tabs ===
-tab2, tab1, tab3 = st.tabs([
+tab2, tab1, tab3, tab4 = st.tabs([
     "📈 Agent Progress Dashboard",
     "📊 Daily Metrics Overview",
-    "📈 Daily Sales Trend"  
+    "📈 Daily Sales Trend",
+    "📚 Metrics History"
 ])
 
 
@@ -631,40 +694,14 @@ with tab1:
             else:
                 df = raw_data.copy()
 
-            # Insert total rows for agents with multiple entries
+            # Totals, hh:mm:ss times, no debug columns, blanks for missing values
             rep_date = pd.to_datetime(df["Report Date"].iloc[0])
-            export_df = insert_total_rows(df, rep_date)
-
-
+            export_df = prepare_sheet_export(df, rep_date)
 
             if export_df.empty:
                 st.error("⚠️ No data found to export.")
                 st.stop()
 
-            export_df = export_df.sort_values(by=["Office", "Agent", "Time Connected"])
-
-
-            # ✅ Adjust Time Connected by removing mismatch
-            if "_MismatchAmount" in export_df.columns and "Time Connected" in export_df.columns:
-                export_df["Time Connected"] = (
-                    export_df["Time Connected"] - export_df["_MismatchAmount"]
-                ).clip(lower=0)
-
-
-            # Clean time columns: replace empty strings with NaN
-            for col in ["Time To Goal", "Time Connected", "Break", "Talk Time", "Wrap Up"]:
-                if col in export_df.columns:
-                    export_df[col] = pd.to_numeric(export_df[col], errors="coerce")
-                    if col == "Time To Goal":
-                        export_df[col] = export_df[col].apply(lambda x: decimal_to_hhmmss(x) if pd.notna(x) else "")
-                    else:
-                        export_df[col] = export_df[col].apply(lambda x: decimal_to_hhmmss_nosign(x) if pd.notna(x) else "")
-
-
-            # Drop internal/debug columns
-            debug_cols = ["Time Mismatch", "_MismatchAmount", "_TTG_Adjusted"]
-            export_df = export_df.drop(columns=[col for col in debug_cols if col in export_df.columns])
-
             # Connect to sheet
             sheet = connect_to_gsheet(SHEET_ID)
             local_tz = pytz.timezone("America/Mexico_City")
@@ -672,7 +709,6 @@ with tab1:
             worksheet = create_unique_worksheet(sheet, today_str)
 
             # Export
-            export_df = export_df.fillna("")
             export_df_to_sheet(export_df, worksheet)
             st.success(f"✅ Exported to tab '{worksheet.title}' successfully!")
 
@@ -751,6 +787,21 @@ with tab1:
 ############################
 with tab2:
     st.markdown("🎯 **Goal:** Maximize Time Connected & Talk Time ✅ Keep Breaks & Wrap-Up within limits 🚦")
+
+    # 🎨 Chart renderer for this export: Plotly/Kaleido PNGs or native SVG (no browser)
+    chart_renderer = st.radio(
+        "Chart renderer",
+        options=list(CHART_FORMATS),
+        index=list(CHART_FORMATS).index(CHART_RENDERER) if CHART_RENDERER in CHART_FORMATS else 0,
+        format_func=lambda name: {"kaleido": "Plotly (Kaleido PNG)", "svg": "Native SVG (fast)"}[name],
+        horizontal=True,
+    )
+    chart_format = CHART_FORMATS[chart_renderer]
+
+    # 🔥 Warm the chart renderers in the background so the export never pays the browser start
+    if chart_renderer == "kaleido" and not st.session_state.get("chart_renderer_started"):
+        threading.Thread(target=start_chart_renderer, daemon=True).start()
+        st.session_state["chart_renderer_started"] = True
     
     # === BUTTON: Download PDF ===
     if st.button("📥 Download Summary PDF"):
@@ -776,7 +827,7 @@ with tab2:
 
             # STEP 2: Attach unique summary DF to each office's DataFrame for PDF logic
             grouped_by_office = {}
-            for office, office_df in df.groupby("Office"):
+            for office, office_df in df.groupby("Office", observed=True):
                 office_agents = office_df["Agent"].unique()
                 office_summary_df = unique_agents[unique_agents["Agent"].isin(office_agents)]
                 office_df_sorted = office_df.sort_values(["Agent", "Time Connected"], ascending=[True, False])
@@ -789,66 +840,50 @@ with tab2:
 
 
             # Initialize progress bar
-            total = sum(len(df) for df in grouped_by_office.values())
             progress = st.progress(0)
             status = st.empty()
-            count = 0
 
-            # ─── Generate all charts for the FULL report with progress ───
+            def report_chart_progress(done, total):
+                progress.progress(int(done / total * 100))
+                status.text(f"Generating charts: {done}/{total}")
+
+            # ─── Generate all charts for the FULL report in one batch ───
+            chart_jobs = []
             for office_df in grouped_by_office.values():
                 for _, row in office_df.iterrows():
-                    count += 1
-                    progress.progress(int(count / total * 100))
-                    status.text(f"Generating charts: {count}/{total}")
-
                     color = "#666666" if row.get("is_total") is True else None
-                    fig = build_export_figure(row, color_override=color)
-                    img_path = os.path.join(
-                        tmpdir,
-                        f"{row['Agent'].replace(' ', '_')}_{row.name}.png"
-                    )
-                    pio.write_image(fig, img_path, format="png", scale=0.5)
-
+                    img_path = os.path.join(tmpdir, export_chart_filename(row, chart_format))
+                    chart_jobs.append((row, img_path, color))
 
-
-            # === Export full report ===
-            full_pdf_path = os.path.join(tmpdir, f"Agent_Report_{date_str}.pdf")
-            export_html_pdf(grouped_by_office, full_pdf_path, chart_folder=tmpdir)
-            final_full_path = os.path.join(OUTPUT_DIR, f"Agent_Report_{date_str}.pdf")
-            shutil.copyfile(full_pdf_path, final_full_path)
-            st.session_state["pdf_paths"]["full"] = final_full_path
+            # Cached charts are reused; the rest render concurrently on the warm renderer pool
+            chart_stats = render_export_charts(
+                chart_jobs, scale=0.5, progress_callback=report_chart_progress, renderer=chart_renderer
+            )
+            status.text(f"Charts ready: {chart_stats['reused']} reused / {chart_stats['rendered']} rendered")
+            with log_expander:
+                cache_stats = get_chart_cache_stats()
+                st.info(
+                    f"🗄️ Chart cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses / "
+                    f"{cache_stats['evictions']} evictions"
+                )
 
 
-            # === Export each office separately ===
-            for office, office_df in grouped_by_office.items():
-                if office_df.empty:
-                    continue
 
-                 # create a folder of copies for this office
-                office_tmpdir = os.path.join(tmpdir, "per_office", office)
-                os.makedirs(office_tmpdir, exist_ok=True)
-                
-                for _, row in office_df.iterrows():
-                    # filename matches the one you already rendered above
-                    filename = f"{row['Agent'].replace(' ', '_')}_{row.name}.png"
-                    src = os.path.join(tmpdir, filename)
-                    dst = os.path.join(office_tmpdir, filename)
-                    shutil.copyfile(src, dst)
-
-                office_pdf_path = os.path.join(
-                    office_tmpdir, f"{office}_Report_{date_str}.pdf"
-                )
-                export_html_pdf(
-                    {office: office_df},
-                    office_pdf_path,
-                    chart_folder=office_tmpdir
-                )
+            # === Export each office once, in parallel (charts are read straight from tmpdir) ===
+            office_pdf_paths = export_office_pdfs(
+                grouped_by_office,
+                OUTPUT_DIR,
+                date_str,
+                chart_folder=tmpdir,
+                chart_format=chart_format,
+                workers=PDF_EXPORT_WORKERS,
+            )
 
-                final_office_path = os.path.join(
-                    OUTPUT_DIR, f"{office}_Report_{date_str}.pdf"
-                )
-                shutil.copyfile(office_pdf_path, final_office_path)
-                st.session_state["pdf_paths"][office] = final_office_path
+            # === Full report = cover page + the office PDFs (no second layout pass) ===
+            final_full_path = os.path.join(OUTPUT_DIR, f"Agent_Report_{date_str}.pdf")
+            export_full_report_pdf(grouped_by_office, office_pdf_paths, final_full_path)
+            st.session_state["pdf_paths"]["full"] = final_full_path
+            st.session_state["pdf_paths"].update(office_pdf_paths)
 
 
 
@@ -865,10 +900,9 @@ with tab2:
 
     # === Download Buttons ===
     if st.session_state.get("pdf_paths", {}).get("full"):
-        with open(st.session_state["pdf_paths"]["full"], "rb") as f:
-            st.download_button(
+        st.download_button(
             label="📄 All Office Report",
-            data=f.read(),
+            data=read_download_payload(st.session_state["pdf_paths"]["full"]),
             file_name=os.path.basename(st.session_state["pdf_paths"]["full"]),
             mime="application/pdf",
             use_container_width=True
@@ -876,14 +910,13 @@ with tab2:
 
 
     if st.session_state.get("pdf_paths", {}).get("offices_zip"):
-        with open(st.session_state["pdf_paths"]["offices_zip"], "rb") as f:
-            st.download_button(
-                label="📦 Download individual office reports",
-                data=f.read(),
-                file_name=os.path.basename(st.session_state["pdf_paths"]["offices_zip"]),
-                mime="application/zip",
-                use_container_width=True
-            )
+        st.download_button(
+            label="📦 Download individual office reports",
+            data=read_download_payload(st.session_state["pdf_paths"]["offices_zip"]),
+            file_name=os.path.basename(st.session_state["pdf_paths"]["offices_zip"]),
+            mime="application/zip",
+            use_container_width=True
+        )
 
 
 
@@ -993,29 +1026,34 @@ if (
     "full" in st.session_state["pdf_paths"] and 
     os.path.exists(st.session_state["pdf_paths"]["full"])
 ):
-    # Full PDF
-    with open(st.session_state["pdf_paths"]["full"], "rb") as f:
-        st.download_button(
-            label="📄 Click to Download Full PDF",
-            data=f.read(),
-            file_name=os.path.basename(st.session_state["pdf_paths"]["full"]),
-            mime="application/pdf",
-            use_container_width=True
-        )
+    # Full PDF (same cached payload as the button above, no second disk read)
+    st.download_button(
+        label="📄 Click to Download Full PDF",
+        data=read_download_payload(st.session_state["pdf_paths"]["full"]),
+        file_name=os.path.basename(st.session_state["pdf_paths"]["full"]),
+        mime="application/pdf",
+        use_container_width=True
+    )
 
     # Per-Office PDFs
     st.markdown("### 📥 Download PDF per Office")
     for office in sorted(k for k in st.session_state["pdf_paths"].keys() if k != "full"):
         path = st.session_state["pdf_paths"][office]
         if os.path.exists(path):
-            with open(path, "rb") as f:
-                st.download_button(
-                    label=f"📄 Download {office} PDF",
-                    data=f.read(),
-                    file_name=os.path.basename(path),
-                    mime="application/pdf",
-                    use_container_width=True
-                )
+            st.download_button(
+                label=f"📄 Download {office} PDF",
+                data=read_download_payload(path),
+                file_name=os.path.basename(path),
+                mime="application/pdf",
+                use_container_width=True
+            )
+
+    with log_expander:
+        cache_stats = get_download_cache_stats()
+        st.info(
+            f"🗄️ Download cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses / "
+            f"{cache_stats['evictions']} evictions"
+        )
 
 
 
@@ -1027,6 +1065,43 @@ if (
 
 
 
+############################
+# TAB 4: Metrics History (local Parquet archive)
+############################
+with tab4:
+    st.markdown("### 📚 **Metrics History**")
+
+    hist_col1, hist_col2, hist_col3 = st.columns(3)
+    history_range = hist_col1.date_input(
+        "📅 Date range", (report_date - timedelta(days=6), report_date), key="history_range"
+    )
+    history_group = hist_col2.radio("Group by", ["Office", "Agent"], horizontal=True, key="history_group")
+    history_period = hist_col3.selectbox("Period", ["Whole range", "Weekly", "Daily"], key="history_period")
+    history_offices = st.multiselect("🏢 Offices", OFFICE_CATEGORIES, key="history_offices")
+
+    # The range picker returns a single date while the user is still choosing
+    if isinstance(history_range, (list, tuple)) and len(history_range) == 2:
+        try:
+            history_df = query_archive_metrics(
+                history_range[0],
+                history_range[1],
+                by=history_group.lower(),
+                period={"Whole range": None, "Weekly": "week", "Daily": "day"}[history_period],
+                offices=history_offices or None,
+            )
+            if history_df.empty:
+                st.info("ℹ️ No archived days in this range yet. Each day is archived when its report is loaded.")
+            else:
+                st.dataframe(history_df, use_container_width=True, hide_index=True)
+        except Exception as e:
+            st.error(f"❌ Could not query the archive: {e}")
+    else:
+        st.info("📅 Pick a start and end date.")
+
+
+
+
+
 with tab3:
 
 
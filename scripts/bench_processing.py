@@ -0,0 +1,165 @@
+"""
+Benchmarks the vectorized processing paths against the per-row code they replaced.
+
+Generates a synthetic ReadyMode-style report, checks that both paths give the
+same result, and prints the best-of-N timings.
+
+Usage:
+    python scripts/bench_processing.py
+    python scripts/bench_processing.py --rows 10000 1000000 --repeat 3
+    python scripts/bench_processing.py --only ttg --rows 10000 200000 --repeat 1
+
+The row-wise TTG baseline takes a few minutes at 1M rows.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import data_processor as dp  # noqa: E402
+
+
+def _format_duration(seconds, style):
+    """
+    Formats seconds the way the report exports do (HH:MM:SS, verbose, float hours or '-').
+    """
+    h, m, s = seconds // 3600, (seconds % 3600) // 60, seconds % 60
+    if style == 0:
+        return f"{h:02}:{m:02}:{s:02}"
+    if style == 1:
+        return f"{h} hours {m} min {s} s" if h else f"{m} min {s} s"
+    if style == 2:
+        return str(round(seconds / 3600, 2))
+    return "-"
+
+
+def make_duration_column(rows, seed=0):
+    """
+    Returns a Series of raw duration cells mixing every format the parser accepts.
+    """
+    rng = np.random.default_rng(seed)
+    seconds = rng.integers(0, 12 * 3600, rows)
+    styles = rng.choice(4, rows, p=[0.45, 0.45, 0.05, 0.05])
+    cells = [_format_duration(int(sec), int(style)) for sec, style in zip(seconds, styles)]
+    series = pd.Series(cells, dtype=object)
+    series[rng.random(rows) < 0.02] = np.nan
+    return series
+
+
+def _best_of(func, repeat):
+    """
+    Runs func repeat times and returns (best seconds, last result).
+    """
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_durations(rows, repeat):
+    """
+    Series.apply(time_string_to_decimal) vs time_strings_to_decimal.
+    """
+    cells = make_duration_column(rows)
+    baseline, expected = _best_of(lambda: cells.apply(dp.time_string_to_decimal).astype(float), repeat)
+    vectorized, actual = _best_of(lambda: dp.time_strings_to_decimal(cells), repeat)
+    pd.testing.assert_series_equal(actual, expected, check_names=False)
+    return baseline, vectorized
+
+
+AGENTS = ["n ana", "a bob", "w atef", "w retano", "sp tony", "pr carl", "e omar", "s luis", "g tigre", "pr dan"]
+
+
+def make_ttg_frame(rows, seed=0):
+    """
+    Returns processed-style rows (Agent, Office, durations, mismatch) for the TTG benchmark.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Agent": rng.choice(AGENTS, rows),
+        "Time Connected": rng.uniform(0, 11, rows).round(3),
+        "Break": rng.uniform(0, 4, rows).round(3),
+        "Wrap Up": rng.uniform(0, 2, rows).round(3),
+        "_MismatchAmount": np.where(rng.random(rows) < 0.1, rng.uniform(0, 1, rows), 0.0),
+    })
+    df["Office"] = df["Agent"].map(dp.classify_office)
+    return df
+
+
+def _ttg_row_baseline(df, report_date):
+    """
+    The per-row TTG that calculate_ttg_columns replaced (df.apply(axis=1), one goal lookup per row).
+    """
+    def calculate_ttgs(row):
+        goal_time, break_limit, wrap_limit, _, _ = dp.get_daily_time_goals(
+            report_date, agent=row.get("Agent"), office=row.get("Office")
+        )
+        tc = row.get("Time Connected", 0)
+        br = row.get("Break", 0)
+        wr = row.get("Wrap Up", 0)
+
+        extra_break = max(0, br - break_limit)
+        extra_wrap = max(0, wr - wrap_limit)
+
+        available_break = max(0, break_limit - br)
+        available_wrap = max(0, wrap_limit - wr)
+
+        wrap_offset = min(extra_wrap, available_break)
+        break_offset = min(extra_break, available_wrap)
+
+        extra_wrap -= wrap_offset
+        extra_break -= break_offset
+
+        total_penalty = extra_break + extra_wrap
+        mismatch_penalty = row.get("_MismatchAmount", 0)
+
+        ttg = (tc - goal_time - total_penalty) - mismatch_penalty
+        adjusted = mismatch_penalty > 0
+        return pd.Series([ttg, adjusted])
+
+    df[["Time To Goal", "_TTG_Adjusted"]] = df.apply(calculate_ttgs, axis=1)
+    return df
+
+
+def bench_ttg(rows, repeat):
+    """
+    Row-wise df.apply TTG vs add_time_to_goal (calculate_ttg_columns).
+    """
+    report_date = pd.Timestamp("2025-07-18")  # a Friday, so the Egypt/West overrides are exercised
+    df = make_ttg_frame(rows)
+    baseline, expected = _best_of(lambda: _ttg_row_baseline(df.copy(), report_date), repeat)
+    vectorized, actual = _best_of(lambda: dp.add_time_to_goal(df.copy(), report_date), repeat)
+    np.testing.assert_allclose(actual["Time To Goal"], expected["Time To Goal"].astype(float), atol=1e-9)
+    assert (actual["_TTG_Adjusted"].to_numpy() == expected["_TTG_Adjusted"].astype(bool).to_numpy()).all()
+    return baseline, vectorized
+
+
+BENCHMARKS = {
+    "durations": bench_durations,
+    "ttg": bench_ttg,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), nargs="+", default=list(BENCHMARKS))
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<12} {'rows':>10} {'baseline':>12} {'vectorized':>12} {'speedup':>9}")
+    for name in args.only:
+        for rows in args.rows:
+            baseline, vectorized = BENCHMARKS[name](rows, args.repeat)
+            print(f"{name:<12} {rows:>10,} {baseline * 1000:>10.1f}ms {vectorized * 1000:>10.1f}ms "
+                  f"{baseline / vectorized:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import data_processor as dp  # noqa: E402
+
+
+REPORT_DATE = date(2025, 7, 21)
+
+
+def readymode_report(rows):
+    """
+    Builds a raw ReadyMode export (plus its footer row) from
+    (login, shift start, shift end, logged, break, sales, talk, wrap) tuples.
+    """
+    columns = [
+        "Login ID", "Shift Start", "Shift End", "Logged Time", "Break (t)",
+        "Appointments (#)", "Ready:Talk Time", "Ready:Wrap Time",
+    ]
+    df = pd.DataFrame(rows, columns=columns)
+    return pd.concat([df, pd.DataFrame([{"Login ID": "Total"}])], ignore_index=True)
+
+
+def chase_report(rows):
+    """
+    Builds a raw Chase timesheet (plus its footer row) from
+    (agent, login, logout, session, talk, break, wrap, sales) tuples.
+    """
+    columns = [
+        "Agente", "Hora de Inicio de Sesión", "Hora de Cierre de Sesión", "Tiempo en Sesión",
+        "Duración de Conversación", "Duración de Receso", "Tiempo de Finalización",
+        "Ventas/Potencial/Cita",
+    ]
+    df = pd.DataFrame(rows, columns=columns)
+    return pd.concat([df, pd.DataFrame([{"Agente": "Total general"}])], ignore_index=True)
+
+
+@pytest.fixture
+def raw_reports():
+    """
+    Two ReadyMode servers and a Chase file; "a bob" works on both servers.
+    """
+    server_1 = readymode_report([
+        ("a bob", "Jul 21 7:40AM", "Jul 21 11:40AM", "04:00:00", "00:20:00", 2, "02:00:00", "00:10:00"),
+        ("n ana", "Jul 21 7:58AM", "Jul 21 4:00PM", "08:00:00", "00:45:00", 1, "04:00:00", "00:20:00"),
+        ("w atef", "garbage", "Jul 21 3:00PM", "07:00:00", "00:30:00", 0, "03:00:00", "00:15:00"),
+    ])
+    server_2 = readymode_report([
+        ("a bob", "Jul 21 12:00PM", "Jul 21 6:00PM", "06:00:00", "00:30:00", 1, "02:30:00", "00:15:00"),
+        ("pr carl", "Jul 21 8:20AM", "Jul 21 5:00PM", "08:30:00", "01:00:00", 3, "05:00:00", "00:30:00"),
+    ])
+    chase = chase_report([
+        ("e omar", "21/07/2025 9:30:00", "21/07/2025 18:00:00", "08:00:00", "04:00:00", "00:40:00", "00:20:00", "2 ventas"),
+    ])
+    return [
+        ("ReadyMode_automation1_x.csv", server_1),
+        ("ReadyMode_automation2_x.csv", server_2),
+        ("chase.csv", chase),
+    ]
+
+
+@pytest.fixture
+def processed_report(raw_reports):
+    return dp.load_and_process_data(raw_reports, REPORT_DATE)
@@ -0,0 +1,83 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+import data_processor as dp
+from conftest import REPORT_DATE
+
+
+def test_query_archive_metrics_counts_one_shift_per_agent_day(processed_report, tmp_path):
+    dp.archive_processed_data(processed_report, REPORT_DATE, archive_dir=str(tmp_path))
+
+    result = dp.query_archive_metrics(REPORT_DATE, by="agent", archive_dir=str(tmp_path))
+    result = result.set_index("Agent")
+
+    # Expected values: TTG and hours from the total rows the PDF/summary use,
+    # lateness from the agent's earliest clock-in
+    df = pd.concat(processed_report.values(), ignore_index=True)
+    df = df.loc[:, ~df.columns.duplicated()]
+    totals = dp.insert_total_rows(df, pd.Timestamp(REPORT_DATE))
+    last_rows = totals.groupby("Agent").tail(1).set_index("Agent")  # total row if the agent has one
+    earliest_late = dp.minutes_late_column(df, pd.Timestamp(REPORT_DATE)).groupby(df["Agent"]).min()
+
+    assert (result["Shifts"] == 1).all()
+    for agent, row in last_rows.iterrows():
+        assert result.loc[agent, "TTG Attainment %"] == (100.0 if row["Time To Goal"] >= 0 else 0.0)
+        assert result.loc[agent, "Late %"] == (0.0 if earliest_late[agent] <= 5 else 100.0)
+        assert np.isclose(result.loc[agent, "Hours Connected"], round(row["Time Connected"], 2))
+
+
+def test_query_archive_metrics_agent_on_two_servers(processed_report, tmp_path):
+    dp.archive_processed_data(processed_report, REPORT_DATE, archive_dir=str(tmp_path))
+
+    bob = dp.query_archive_metrics(REPORT_DATE, by="agent", archive_dir=str(tmp_path))
+    bob = bob[bob["Agent"] == "a bob"].iloc[0]
+
+    # 7:40 AM clock-in on Server 1 (on time), 12:00 PM on Server 2; 10h connected in total
+    assert bob["Shifts"] == 1
+    assert bob["Hours Connected"] == 10.0
+    assert bob["TTG Attainment %"] == 100.0
+    assert bob["Late %"] == 0.0
+
+
+def test_archived_report_round_trips(processed_report, tmp_path):
+    dp.archive_processed_data(processed_report, REPORT_DATE, archive_dir=str(tmp_path))
+
+    loaded = dp.load_archived_report(REPORT_DATE, archive_dir=str(tmp_path), complete_only=False)
+
+    assert list(loaded) == list(processed_report)
+    for server, df in processed_report.items():
+        pd.testing.assert_frame_equal(loaded[server], df)
+
+
+def test_archive_skips_unchanged_days_and_keeps_dropbox_data(processed_report, tmp_path):
+    assert dp.archive_processed_data(processed_report, REPORT_DATE, archive_dir=str(tmp_path))
+    assert dp.archive_processed_data(processed_report, REPORT_DATE, archive_dir=str(tmp_path)) is None
+
+    uploaded = {server: df.head(1) for server, df in processed_report.items()}
+    with pytest.raises(ValueError):
+        dp.archive_processed_data(uploaded, REPORT_DATE, archive_dir=str(tmp_path), source="upload")
+
+    loaded = dp.load_archived_report(REPORT_DATE, archive_dir=str(tmp_path), complete_only=False)
+    assert sum(len(df) for df in loaded.values()) == sum(len(df) for df in processed_report.values())
+
+
+def test_load_archived_data_reads_only_requested_partitions_and_columns(processed_report, tmp_path):
+    dp.archive_processed_data(processed_report, REPORT_DATE, archive_dir=str(tmp_path))
+
+    # A partition outside the range that would fail to parse if it were opened
+    next_day = tmp_path / "report_date=2025-07-22"
+    next_day.mkdir()
+    (next_day / "data.parquet").write_bytes(b"not a parquet file")
+
+    df = dp.load_archived_data(REPORT_DATE, columns=["Agent", "Sales"], archive_dir=str(tmp_path))
+
+    assert list(df.columns) == ["Agent", "Sales", "Report Date"]
+    assert (df["Report Date"] == "2025-07-21").all()
+    assert len(df) == sum(len(frame) for frame in processed_report.values())
+
+    with pytest.raises(pa.ArrowInvalid):  # the bad file is only read when its date is in range
+        dp.load_archived_data(REPORT_DATE, date(2025, 7, 22), archive_dir=str(tmp_path))
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_processor as dp
+
+
+CELLS = [
+    # blanks and placeholders
+    None, np.nan, "", "   ", "-", " - ", "nan",
+    # HH:MM:SS, including > 24h and single-digit hours
+    "00:00:00", "07:30:15", "9:05:00", "24:00:00", "36:59:59", "99:59:59", "100:00:00",
+    # plain numbers, negatives included
+    "1.5", "0", "-1.5", "-0.25", "1e3", "inf",
+    # verbose ReadyMode durations, > 24h included
+    "2 hours 43 min 30 s", "1 hour 5 min", "45 min 10 s", "30 s", "26 hours 0 min 1 s",
+    # malformed cells
+    "abc", "12:3", "1:2:3", "-01:00:00", "hours", "min", "3 hrs", "7:30:15 extra",
+]
+
+
+@pytest.mark.parametrize("cell", CELLS, ids=repr)
+def test_column_parser_matches_scalar_parser(cell):
+    values = pd.Series([cell, "01:00:00"], dtype=object)  # object column, as read from a CSV
+
+    expected = values.apply(dp.time_string_to_decimal).astype(float)
+    pd.testing.assert_series_equal(dp.time_strings_to_decimal(values), expected)
+
+
+def test_column_parser_matches_scalar_parser_on_a_mixed_column():
+    values = pd.Series(CELLS * 3, dtype=object)
+
+    expected = values.apply(dp.time_string_to_decimal).astype(float)
+    pd.testing.assert_series_equal(dp.time_strings_to_decimal(values), expected)
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_processor as dp
+
+
+VALUES = [
+    0.0, 1.5, 9.5, 2 + 20 / 60, 0.0001, -0.0001, -0.5, -12.25, 123.75,
+    1 + 59 / 60 + 59.9995 / 3600,   # truncated to :59, never rounded up to the next minute
+    -(1 + 59 / 60 + 59.9995 / 3600),
+    59.9995 / 3600,
+]
+
+
+@pytest.mark.parametrize("column, scalar", [
+    (dp.decimal_to_hhmmss_column, dp.decimal_to_hhmmss),
+    (dp.decimal_to_hhmmss_nosign_column, dp.decimal_to_hhmmss_nosign),
+])
+def test_column_formatters_match_scalar_formatters(column, scalar):
+    values = pd.Series(VALUES + [np.nan], index=range(10, 10 + len(VALUES) + 1))
+
+    expected = values.map(scalar)
+    pd.testing.assert_series_equal(column(values), expected)
+
+
+def test_truncation_at_the_end_of_a_minute():
+    values = pd.Series([1 + 59 / 60 + 59.9995 / 3600, -(59.9995 / 3600)])
+
+    assert list(dp.decimal_to_hhmmss_column(values)) == ["+01:59:59", "-00:00:59"]
+    assert list(dp.decimal_to_hhmmss_nosign_column(values)) == ["01:59:59", "00:00:59"]
+
+
+@pytest.mark.parametrize("column", [dp.decimal_to_hhmmss_column, dp.decimal_to_hhmmss_nosign_column])
+def test_infinite_and_missing_cells_use_the_missing_text(column):
+    values = pd.Series([np.inf, -np.inf, np.nan, None, "abc", 1.0])
+
+    assert list(column(values, missing="--:--:--"))[:5] == ["--:--:--"] * 5
+
+
+def test_scalar_formatters_still_reject_infinity():
+    with pytest.raises(OverflowError):
+        dp.decimal_to_hhmmss(np.inf)
+    with pytest.raises(OverflowError):
+        dp.decimal_to_hhmmss_nosign(-np.inf)
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_processor as dp
+
+
+@pytest.mark.parametrize("first_call, shift_end, time_connected, flag, amount", [
+    ("Jul 21 8:00AM", "Jul 21 4:00PM", 7.5, "✅", 0.0),             # under the shift
+    ("Jul 21 8:00AM", "Jul 21 4:00PM", 8.0, "✅", 0.0),             # exactly the shift: not flagged
+    ("Jul 21 8:00AM", "Jul 21 4:00PM", 8.25, "⚠️ +00:15:00", 0.25),  # any excess is flagged
+    ("Jul 21 8:00AM", "Jul 21 8:00AM", 0.5, "⚠️ +00:30:00", 0.5),    # zero-length shift
+    ("Jul 21 10:00PM", "Jul 22 6:00AM", 9.0, "⚠️ +01:00:00", 1.0),   # overnight shift
+    ("Jul 21 10:00PM", "Jul 22 6:00AM", 7.0, "✅", 0.0),
+    ("Jul 21 8:00AM", "Jul 21 4:00PM", np.nan, "⚠️ Missing", 0.0),
+    ("garbage", "Jul 21 4:00PM", 8.0, "⚠️", 0.0),
+    (np.nan, "Jul 21 4:00PM", 8.0, "⚠️", 0.0),
+])
+def test_mismatch_threshold_and_sign(first_call, shift_end, time_connected, flag, amount):
+    df = pd.DataFrame({
+        "Agent": ["a bob"],
+        "1st Call": [first_call],
+        "Shift End": [shift_end],
+        "Time Connected": [time_connected],
+    })
+
+    result = dp.detect_inconsistencies(df)
+
+    assert result.loc[0, "Time Mismatch"] == flag
+    assert result.loc[0, "_MismatchAmount"] == pytest.approx(amount)
+
+
+def test_only_unchecked_rows_get_a_debug_trace():
+    df = pd.DataFrame({
+        "Agent": ["a bob", "n ana", "w atef"],
+        "1st Call": ["Jul 21 8:00AM", "Jul 21 8:00AM", "garbage"],
+        "Shift End": ["Jul 21 4:00PM", "Jul 21 4:00PM", "Jul 21 4:00PM"],
+        "Time Connected": [9.0, np.nan, 8.0],
+    })
+
+    result = dp.detect_inconsistencies(df)
+
+    assert list(result["_Debug"]) == ["", "Missing Time Connected", "w atef | Error: unparseable shift times"]
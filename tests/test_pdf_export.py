@@ -0,0 +1,45 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+from pypdf import PdfReader
+
+import data_processor as dp
+from conftest import readymode_report
+
+
+FRIDAY = date(2025, 7, 18)
+
+
+@pytest.fixture
+def friday_offices():
+    """
+    One Egypt agent and one prime agent on a Friday, grouped by office the way main exports them.
+    """
+    raw = readymode_report([
+        ("e omar", "Jul 18 7:40AM", "Jul 18 4:00PM", "08:00:00", "00:30:00", 1, "04:00:00", "00:20:00"),
+        ("pr carl", "Jul 18 7:40AM", "Jul 18 4:00PM", "08:00:00", "00:30:00", 1, "04:00:00", "00:20:00"),
+    ])
+    data = dp.load_and_process_data([("ReadyMode_automation1_x.csv", raw)], FRIDAY)
+    df = pd.concat(data.values(), ignore_index=True)
+
+    grouped = {}
+    for office, office_df in df.groupby("Office", observed=True):
+        office_df = dp.insert_total_rows(office_df, pd.Timestamp(FRIDAY))
+        office_df.attrs["unique_summary_rows"] = office_df.drop_duplicates("Agent")
+        grouped[office] = office_df
+    return grouped
+
+
+@pytest.mark.parametrize("engine", sorted(dp.PDF_ENGINES))
+@pytest.mark.parametrize("office, goal, break_limit", [
+    ("Egypt", "09:30:00", "02:20:00"),      # Egypt works Friday on the Mon–Thu schedule
+    ("Sp & Prime", "08:00:00", "02:00:00"),  # prime agents work 30 minutes more
+])
+def test_goal_paragraph_uses_the_office_goals(friday_offices, tmp_path, engine, office, goal, break_limit):
+    path = tmp_path / f"{office}.pdf"
+    dp.PDF_ENGINES[engine]({office: friday_offices[office]}, str(path), str(tmp_path))
+
+    text = " ".join(PdfReader(str(path)).pages[0].extract_text().split())
+    assert f"Time Connected: {goal}" in text
+    assert f"Break Limit: {break_limit}" in text
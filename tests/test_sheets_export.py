@@ -0,0 +1,31 @@
+import pandas as pd
+
+import data_processor as dp
+from conftest import REPORT_DATE
+
+
+def test_prepare_sheet_export_handles_categorical_office(processed_report):
+    df = pd.concat(processed_report.values(), ignore_index=True)
+    assert isinstance(df["Office"].dtype, pd.CategoricalDtype)
+
+    export_df = dp.prepare_sheet_export(df, pd.Timestamp(REPORT_DATE))
+
+    assert not export_df.empty
+    assert not export_df.isna().any().any()
+    assert "_MismatchAmount" not in export_df.columns
+    assert "_PunctualityStatus" not in export_df.columns
+    assert set(export_df["Office"]) <= set(dp.OFFICE_CATEGORIES)
+
+    # Rows must serialize for gspread (plain values, no NaN)
+    data = [export_df.columns.values.tolist()] + export_df.values.tolist()
+    assert all(value == value for row in data for value in row)
+
+
+def test_prepare_sheet_export_adds_totals_and_formats_times(processed_report):
+    df = pd.concat(processed_report.values(), ignore_index=True)
+
+    export_df = dp.prepare_sheet_export(df, pd.Timestamp(REPORT_DATE))
+
+    bob = export_df[export_df["Agent"] == "a bob"]
+    assert len(bob) == 3  # two servers + total
+    assert bob["Time Connected"].str.match(r"^\d{2}:\d{2}:\d{2}$").all()
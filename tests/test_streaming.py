@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+from io import BytesIO
+from types import SimpleNamespace
+
+import pandas as pd
+
+import data_processor as dp
+from conftest import REPORT_DATE, readymode_report
+
+
+FILE_NAME = "ReadyMode_automation1_x.csv"
+
+
+def multi_day_csv():
+    """
+    A ReadyMode export covering three days (plus an unparseable clock-in), as CSV bytes.
+    """
+    raw = readymode_report([
+        ("a bob", "Jul 20 7:40AM", "Jul 20 4:00PM", "08:00:00", "00:20:00", 2, "02:00:00", "00:10:00"),
+        ("n ana", "Jul 21 7:58AM", "Jul 21 4:00PM", "08:00:00", "00:45:00", 1, "04:00:00", "00:20:00"),
+        ("a bob", "Jul 21 7:40AM", "Jul 21 4:00PM", "08:00:00", "00:20:00", 2, "02:00:00", "00:10:00"),
+        ("w atef", "garbage", "Jul 21 3:00PM", "07:00:00", "00:30:00", 0, "03:00:00", "00:15:00"),
+        ("pr carl", "Jul 22 8:20AM", "Jul 22 5:00PM", "08:30:00", "01:00:00", 3, "05:00:00", "00:30:00"),
+    ])
+    return raw.to_csv(index=False).encode()
+
+
+def test_chunked_ingestion_keeps_only_the_report_date():
+    content = multi_day_csv()
+
+    _, streamed = dp._process_report_csv_chunked(FILE_NAME, content, REPORT_DATE, chunk_size=2)
+    _, whole = dp._process_uploaded_file(FILE_NAME, dp.read_report_csv(content, FILE_NAME), REPORT_DATE)
+
+    expected = whole[~whole["1st Call"].astype(str).str.match(r"Jul (20|22) ")]
+    expected.index = range(1, len(expected) + 1)
+    assert sorted(streamed["Agent"]) == ["a bob", "n ana", "w atef"]
+    pd.testing.assert_frame_equal(streamed, expected)
+
+
+class FakeDropbox:
+    """
+    Just enough of dropbox.Dropbox for get_latest_dropbox_csv; records how files were fetched.
+    """
+
+    def __init__(self, files):
+        self.files = files
+        self.calls = []
+
+    def files_list_folder(self, folder_path):
+        entries = [
+            SimpleNamespace(
+                name=name, path_lower=f"{folder_path}/{name}".lower(), content_hash=f"hash-{name}",
+                size=len(content), server_modified=datetime(2025, 7, 21, 18, tzinfo=timezone.utc),
+            )
+            for name, content in self.files.items()
+        ]
+        return SimpleNamespace(entries=entries, has_more=False, cursor="cursor")
+
+    def files_download(self, path):
+        self.calls.append(("memory", path))
+        return None, SimpleNamespace(content=self.files[path.rsplit("/", 1)[1]])
+
+    def files_download_to_file(self, local_path, path):
+        self.calls.append(("disk", path))
+        with open(local_path, "wb") as f:
+            f.write(self.files[path.rsplit("/", 1)[1]])
+
+
+def test_large_dropbox_files_are_streamed_from_disk(tmp_path):
+    small = readymode_report([
+        ("n ana", "Jul 21 7:58AM", "Jul 21 4:00PM", "08:00:00", "00:45:00", 1, "04:00:00", "00:20:00"),
+    ]).to_csv(index=False).encode()
+    large = multi_day_csv()
+    dbx = FakeDropbox({"ReadyMode_automation1_x.csv": large, "ReadyMode_automation2_x.csv": small})
+
+    files = dict(dp.get_latest_dropbox_csv(
+        "/streaming-test", dbx=dbx, cache_dir=str(tmp_path), report_date=REPORT_DATE,
+        stream_threshold_bytes=len(small),
+    ))
+
+    assert isinstance(files["ReadyMode_automation2_x.csv"], BytesIO)
+    local_path = files["ReadyMode_automation1_x.csv"]
+    assert isinstance(local_path, str)
+    with open(local_path, "rb") as f:
+        assert f.read() == large
+    assert ("disk", "/streaming-test/ReadyMode_automation1_x.csv") in dbx.calls
+
+    data = dp.load_and_process_data(list(files.items()), REPORT_DATE, cache=False)
+    assert sorted(data["Server 1"]["Agent"]) == ["a bob", "n ana", "w atef"]
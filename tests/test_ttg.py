@@ -0,0 +1,108 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_processor as dp
+from conftest import REPORT_DATE, readymode_report
+
+
+def row_ttg(tc, br, wr, mismatch, goal_time, break_limit, wrap_limit):
+    """
+    The per-row formula calculate_ttg_columns replaced (calculate_ttgs / calculate_ttg_value).
+    """
+    extra_break = max(0, br - break_limit)
+    extra_wrap = max(0, wr - wrap_limit)
+
+    available_break = max(0, break_limit - br)
+    available_wrap = max(0, wrap_limit - wr)
+
+    wrap_offset = min(extra_wrap, available_break)
+    break_offset = min(extra_break, available_wrap)
+
+    extra_wrap -= wrap_offset
+    extra_break -= break_offset
+
+    ttg = (tc - goal_time - (extra_break + extra_wrap)) - mismatch
+    return ttg, mismatch > 0
+
+
+@pytest.mark.parametrize("goals", [
+    (9.5, 2 + 20 / 60, 1.0),   # Mon–Thu
+    (10, 2 + 20 / 60, 1.75),   # Mon–Thu, prime + commercial limits
+    (7.5, 2.0, 0.75),          # Friday
+])
+def test_ttg_columns_match_the_row_wise_formula(goals):
+    grid = list(itertools.product(
+        [0.0, 7.5, 9.5, 11.25],                   # Time Connected
+        [0.0, 1.0, 2 + 20 / 60, 3.5, np.nan],      # Break
+        [0.0, 0.5, 0.75, 1.75, 2.5, np.nan],       # Wrap Up
+        [0.0, 0.4],                                # mismatch
+    ))
+    tc, br, wr, mismatch = (np.array(values) for values in zip(*grid))
+
+    ttg, adjusted = dp.calculate_ttg_columns(tc, br, wr, mismatch, *goals)
+
+    expected = [row_ttg(*cells, *goals) for cells in grid]
+    np.testing.assert_allclose(ttg, [value for value, _ in expected], rtol=0, atol=1e-12)
+    assert list(adjusted) == [flag for _, flag in expected]
+
+
+@pytest.fixture
+def two_server_rows():
+    """
+    A default, a prime and a commercial agent, each on two servers (Monday report).
+    """
+    server_1 = readymode_report([
+        ("a bob", "Jul 21 7:40AM", "Jul 21 11:40AM", "04:00:00", "01:10:00", 2, "02:00:00", "00:45:00"),
+        ("pr carl", "Jul 21 7:40AM", "Jul 21 12:40PM", "05:00:00", "01:10:00", 1, "03:00:00", "00:45:00"),
+        ("sp tony", "Jul 21 7:40AM", "Jul 21 12:40PM", "05:00:00", "01:10:00", 1, "03:00:00", "00:45:00"),
+    ])
+    server_2 = readymode_report([
+        ("a bob", "Jul 21 1:00PM", "Jul 21 6:30PM", "05:30:00", "01:10:00", 1, "02:30:00", "00:45:00"),
+        ("pr carl", "Jul 21 1:00PM", "Jul 21 6:00PM", "05:00:00", "01:10:00", 2, "02:30:00", "00:45:00"),
+        ("sp tony", "Jul 21 1:00PM", "Jul 21 6:00PM", "05:00:00", "01:10:00", 2, "02:30:00", "00:45:00"),
+    ])
+    data = dp.load_and_process_data(
+        [("ReadyMode_automation1_x.csv", server_1), ("ReadyMode_automation2_x.csv", server_2)], REPORT_DATE
+    )
+    df = pd.concat(data.values(), ignore_index=True)
+    return df.loc[:, ~df.columns.duplicated()]
+
+
+def test_total_rows_match_row_wise_totals(two_server_rows):
+    result = dp.insert_total_rows(two_server_rows, pd.Timestamp(REPORT_DATE))
+
+    # Each agent's rows come first, then its total
+    assert list(result["Agent"]) == ["a bob"] * 3 + ["pr carl"] * 3 + ["sp tony"] * 3
+    assert list(result["is_total"].eq(True)) == [False, False, True] * 3
+
+    totals = result[result["is_total"].eq(True)].set_index("Agent")
+    for agent, rows in two_server_rows.groupby("Agent"):
+        total = totals.loc[agent]
+        for col in ["Time Connected", "Break", "Talk Time", "Wrap Up", "Sales", "_MismatchAmount"]:
+            assert total[col] == pytest.approx(rows[col].sum())
+
+        goal_time, break_limit, wrap_limit, _, _ = dp.get_daily_time_goals(
+            pd.Timestamp(REPORT_DATE), agent=agent, office=rows["Office"].iloc[0]
+        )
+        ttg, adjusted = row_ttg(
+            total["Time Connected"], total["Break"], total["Wrap Up"], total["_MismatchAmount"],
+            goal_time, break_limit, wrap_limit,
+        )
+        assert total["Time To Goal"] == pytest.approx(ttg)
+        assert total["_TTG_Adjusted"] == adjusted
+
+
+@pytest.mark.parametrize("agent", ["pr carl", "sp tony"])
+def test_prime_and_commercial_totals_use_their_own_goals(two_server_rows, agent):
+    # The old totals always used the default goals; these agents now get theirs
+    result = dp.insert_total_rows(two_server_rows, pd.Timestamp(REPORT_DATE))
+    total = result[result["is_total"].eq(True)].set_index("Agent").loc[agent]
+
+    default_goals = dp.get_daily_time_goals(pd.Timestamp(REPORT_DATE))[:3]
+    default_ttg, _ = row_ttg(
+        total["Time Connected"], total["Break"], total["Wrap Up"], total["_MismatchAmount"], *default_goals
+    )
+    assert total["Time To Goal"] != pytest.approx(default_ttg)